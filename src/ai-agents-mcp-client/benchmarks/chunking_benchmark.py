@@ -0,0 +1,81 @@
+"""Chunks, and so vectors and embedding inputs, per product for each chunking mode.
+
+Run from ``src/ai-agents-mcp-client``:
+
+    python -m benchmarks.chunking_benchmark --catalog catalog.ndjson --max-tokens 100 200 --overlap 0 20
+
+``--catalog`` takes the NDJSON used by bulk ingestion, without it synthetic
+spec-sheet style descriptions are chunked. This only measures chunk counts and
+sizes; to compare retrieval quality, bulk ingest the same catalog into two
+``collection_name`` values with different ``CHUNKING_MODE`` settings and query both.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+
+from chunking.chunking_service import ChunkingService
+from core.tokenizer import get_tokenizer
+
+def synthetic_descriptions(count: int, rng: random.Random) -> list:
+    words = "durable lightweight battery display wireless charging steel fabric warranty shipping size color".split()
+
+    def sentence():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(5, 25))).capitalize() + "."
+
+    return [
+        "\n".join(
+            f"{'#' if section == 0 else '##'} Section {section}\n" + "\n".join(
+                " ".join(sentence() for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(2, 8))
+            )
+            for section in range(rng.randint(2, 6))
+        )
+        for _ in range(count)
+    ]
+
+async def measure(descriptions: list, service: ChunkingService) -> dict:
+    tokenizer = get_tokenizer()
+    counts, sizes = [], []
+    for description in descriptions:
+        document = await service.chunk_document(description)
+        chunks = [
+            sentence.get_content()
+            for section in (document.sections if document else [])
+            for paragraph in section.paragraphs
+            for sentence in paragraph.sentences
+            if sentence.get_content()
+        ]
+        counts.append(len(chunks))
+        sizes.extend(tokenizer.count(chunk) for chunk in chunks)
+    return {
+        "chunks": statistics.mean(counts),
+        "mean_tokens": statistics.mean(sizes) if sizes else 0,
+        "max_tokens": max(sizes, default=0),
+    }
+
+async def main(args):
+    if args.catalog:
+        with open(args.catalog) as catalog:
+            descriptions = [json.loads(line)["description"] for line in catalog if line.strip()]
+    else:
+        descriptions = synthetic_descriptions(args.products, random.Random(0))
+
+    print(f"tokenizer: {get_tokenizer().name}")
+    print(f"{'mode':>10} {'max':>5} {'overlap':>7} {'chunks/product':>15} {'mean tokens':>12} {'max tokens':>11}")
+    configs = [("lines", 0, 0)] + [
+        ("sentences", max_tokens, overlap) for max_tokens in args.max_tokens for overlap in args.overlap
+    ]
+    for mode, max_tokens, overlap in configs:
+        service = ChunkingService(max_length=max_tokens or None, mode=mode, overlap=overlap)
+        result = await measure(descriptions, service)
+        print(f"{mode:>10} {max_tokens or '-':>5} {overlap:>7} {result['chunks']:>15.1f} "
+              f"{result['mean_tokens']:>12.1f} {result['max_tokens']:>11}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog", help="NDJSON file of products with a description field")
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--max-tokens", type=int, nargs="+", default=[100, 200, 400])
+    parser.add_argument("--overlap", type=int, nargs="+", default=[0, 20])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,90 @@
+"""Latency of per-term vs batched query-term embedding against a local stub server.
+
+The stub mimics the OpenAI embeddings endpoint with a fixed per-request latency
+plus a small per-input cost, so the numbers show round-trip savings rather than
+model speed.
+
+Run from ``src/ai-agents-mcp-client``:
+
+    python -m benchmarks.query_embeddings_benchmark --latency-ms 80 --repeat 5
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import statistics
+import time
+
+import numpy as np
+from aiohttp import web
+
+DIMENSIONS = 3072
+
+def fake_embedding(text: str, dimensions: int) -> list:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+def create_stub_app(latency_ms: float, per_input_ms: float) -> web.Application:
+    async def embeddings(request: web.Request) -> web.Response:
+        payload = await request.json()
+        inputs = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+        await asyncio.sleep((latency_ms + per_input_ms * len(inputs)) / 1000)
+        dimensions = payload.get("dimensions") or DIMENSIONS
+        return web.json_response({
+            "object": "list",
+            "model": payload["model"],
+            "data": [
+                {"object": "embedding", "index": index, "embedding": fake_embedding(text, dimensions)}
+                for index, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+        })
+
+    app = web.Application(client_max_size=64 * 1024 ** 2)
+    app.router.add_post("/v1/embeddings", embeddings)
+    return app
+
+async def run(args):
+    runner = web.AppRunner(create_stub_app(args.latency_ms, args.per_input_ms))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    # The embedding cache would hide the round trips we want to measure
+    os.environ.pop("EMBEDDING_CACHE_PATH", None)
+    from mcp_client import MCPClient
+
+    client = MCPClient()
+    try:
+        print(f"{'terms':>6} {'per-term (ms)':>14} {'batched (ms)':>13} {'speedup':>8}")
+        for term_count in args.terms:
+            terms = [f"query term {index}" for index in range(term_count)]
+            per_term, batched = [], []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                # Previous behaviour: one request per term, one after another
+                for term in terms:
+                    await client.client.embeddings.create(model="text-embedding-3-large", input=term)
+                per_term.append((time.perf_counter() - started) * 1000)
+
+                started = time.perf_counter()
+                await client.embed_texts(terms)
+                batched.append((time.perf_counter() - started) * 1000)
+
+            per_term_ms, batched_ms = statistics.median(per_term), statistics.median(batched)
+            print(f"{term_count:>6} {per_term_ms:>14.1f} {batched_ms:>13.1f} {per_term_ms / batched_ms:>7.1f}x")
+    finally:
+        await client.cleanup()
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terms", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="Fixed latency of every stub request")
+    parser.add_argument("--per-input-ms", type=float, default=0.5, help="Extra stub latency per input text")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,81 @@
+"""Recall vs latency of shortened and quantized embeddings in the NumPy vector store.
+
+Ground truth is an exact float32 search at full width. Every configuration
+truncates the vectors to the first ``d`` dimensions and renormalises them, which
+is what the embeddings API returns for ``dimensions=d`` with text-embedding-3
+models, then stores them as float32, float16 or int8.
+
+Run from ``src/ai-agents-mcp-client``:
+
+    python -m benchmarks.recall_benchmark --size 20000 --dimensions 3072 1024 512 256
+
+Synthetic vectors concentrate their variance in the leading dimensions like
+text-embedding-3 outputs do. For numbers that reflect our catalogue, pass real
+full-width vectors saved with ``np.save`` via ``--embeddings``.
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from core.vector_store import NumpyIndex
+
+def synthetic_embeddings(size: int, dimension: int, rng: np.random.Generator) -> np.ndarray:
+    # Clustered points whose per-dimension spread decays with the index
+    centers = rng.standard_normal((max(1, size // 50), dimension), dtype=np.float32)
+    points = centers[rng.integers(0, len(centers), size)] + 0.6 * rng.standard_normal((size, dimension), dtype=np.float32)
+    return points / np.sqrt(1 + np.arange(dimension, dtype=np.float32) / 64)
+
+def normalise(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, top_k: int) -> list:
+    scores = normalise(queries) @ normalise(vectors).T
+    return [set(np.argpartition(-row, top_k - 1)[:top_k]) for row in scores]
+
+def run(vectors: np.ndarray, queries: np.ndarray, truth: list, dimension: int, dtype: str, top_k: int):
+    store = NumpyIndex(dimension=dimension, initial_capacity=len(vectors), dtype=dtype)
+    shortened = vectors[:, :dimension]
+    for start in range(0, len(vectors), 10000):
+        store.upsert([
+            {"id": str(start + offset), "values": values, "metadata": {}}
+            for offset, values in enumerate(shortened[start:start + 10000])
+        ])
+
+    recalls, timings = [], []
+    for query, expected in zip(queries[:, :dimension], truth):
+        started = time.perf_counter()
+        matches = store.query(query, top_k=top_k)
+        timings.append((time.perf_counter() - started) * 1000)
+        recalls.append(len(expected & {int(match["id"]) for match in matches}) / top_k)
+
+    memory = store._matrix.nbytes + (store._scales.nbytes if store._scales is not None else 0)
+    return statistics.mean(recalls), statistics.median(timings), memory / 2 ** 20
+
+def main(args):
+    rng = np.random.default_rng(0)
+    if args.embeddings:
+        vectors = np.load(args.embeddings).astype(np.float32)
+        # Held-out rows are the queries
+        queries, vectors = vectors[:args.queries], vectors[args.queries:]
+    else:
+        vectors = synthetic_embeddings(args.size + args.queries, 3072, rng)
+        queries, vectors = vectors[:args.queries], vectors[args.queries:]
+    truth = exact_top_k(vectors, queries, args.top_k)
+
+    print(f"{'dimensions':>10} {'dtype':>8} {'recall@' + str(args.top_k):>10} {'p50 (ms)':>9} {'memory (MB)':>12}")
+    for dimension in args.dimensions:
+        for dtype in args.dtypes:
+            recall, latency, memory = run(vectors, queries, truth, min(dimension, vectors.shape[1]), dtype, args.top_k)
+            print(f"{dimension:>10} {dtype:>8} {recall:>10.3f} {latency:>9.3f} {memory:>12.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[3072, 1024, 512, 256])
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "float16", "int8"])
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--embeddings", help="Full-width embeddings saved with np.save, one row per text")
+    main(parser.parse_args())
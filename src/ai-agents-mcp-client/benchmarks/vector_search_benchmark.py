@@ -0,0 +1,58 @@
+"""Query latency of the in-process NumPy vector store, no vector service needed.
+
+Run from ``src/ai-agents-mcp-client``:
+
+    python -m benchmarks.vector_search_benchmark --sizes 10000 50000 --dimension 3072
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from core.vector_store import NumpyVectorStore
+
+def build_store(size: int, dimension: int, products: int, rng: np.random.Generator) -> NumpyVectorStore:
+    store = NumpyVectorStore(dimension=dimension, initial_capacity=size)
+    for start in range(0, size, 10000):
+        batch = rng.standard_normal((min(10000, size - start), dimension), dtype=np.float32)
+        store.upsert([
+            {
+                "id": f"vector-{start + offset}",
+                "values": values,
+                "metadata": {"product_id": f"product-{(start + offset) % products}", "level": "sentence" if offset % 4 else "paragraph"},
+            }
+            for offset, values in enumerate(batch)
+        ])
+    return store
+
+def measure(store: NumpyVectorStore, queries: np.ndarray, top_k: int, filter=None) -> float:
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        store.query(query, top_k=top_k, filter=filter)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def main(args):
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, args.dimension), dtype=np.float32)
+    print(f"{'vectors':>9} {'top_k':>6} {'no filter (ms)':>15} {'level filter (ms)':>18} {'50 products (ms)':>17}")
+    for size in args.sizes:
+        store = build_store(size, args.dimension, args.products, rng)
+        product_filter = {"product_id": {"$in": [f"product-{index}" for index in range(50)]}}
+        print(
+            f"{size:>9} {args.top_k:>6} "
+            f"{measure(store, queries, args.top_k):>15.3f} "
+            f"{measure(store, queries, args.top_k, {'level': 'paragraph'}):>18.3f} "
+            f"{measure(store, queries, args.top_k, product_filter):>17.3f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--dimension", type=int, default=3072)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    main(parser.parse_args())
@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
 from typing import List, Optional
-from uuid import uuid4
+from uuid import UUID, uuid4, uuid5
 
 import logging
 
+# Chunk IDs are derived from their content, so re-chunking the same text yields the same IDs
+CHUNK_ID_NAMESPACE = UUID("6f1c2a8e-4b7d-5e93-a0c4-d2b8f17e6a35")
+
 class BaseChunker:
     @abstractmethod
     def create_chunks(self, data):
@@ -11,14 +14,16 @@ class BaseChunker:
 
 
 class Senetence:
-    _id: uuid4
+    _id: Optional[UUID]
     _content: str = ""
 
     def __init__(self, content: str = ""):
-        self._id = uuid4()
+        self._id = None
         self._content = content
 
     def get_id(self):
+        if self._id is None:
+            self._id = uuid5(CHUNK_ID_NAMESPACE, f"sentence:{self._content}")
         return self._id
 
     def get_content(self) -> str:
@@ -26,14 +31,12 @@ class Senetence:
 
 
 class Paragraph:
-    _id: uuid4
-
     def __init__(self, sentences: Optional[List[Senetence]] = None):
-        self._id = uuid4()
         self.sentences = sentences if sentences is not None else []
 
     def get_id(self):
-        return self._id
+        # Not cached, chunkers keep appending sentences after construction
+        return uuid5(CHUNK_ID_NAMESPACE, "paragraph:" + ",".join(str(sentence.get_id()) for sentence in self.sentences))
 
     def restore(self):
         try:
@@ -47,14 +50,11 @@ class Paragraph:
             return None
 
 class Section:
-    _id: uuid4
-
     def __init__(self, paragraphs: Optional[List[Paragraph]] = None):
-        self._id = uuid4()
         self.paragraphs = paragraphs if paragraphs is not None else []
 
     def get_id(self):
-        return self._id
+        return uuid5(CHUNK_ID_NAMESPACE, "section:" + ",".join(str(paragraph.get_id()) for paragraph in self.paragraphs))
 
     def restore(self):
         try: 
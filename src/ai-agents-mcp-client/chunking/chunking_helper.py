@@ -1,5 +1,5 @@
 import logging
-from typing import List
+from typing import Iterator, List, TextIO, Union
 from bs4 import BeautifulSoup, Tag
 import re
 from dotenv import load_dotenv
@@ -171,35 +171,62 @@ class MarkdownSection:
         self.content = content
         self.level = level
 
-def format_markdown_article(raw_markdown: str) -> List[MarkdownSection]:
-    try:
-        sections: List[MarkdownSection] = []
-        current_heading = None
-        current_heading_tag = None
-        current_level = 1
-        current_content: List[str] = []
-        for line in raw_markdown.replace('\\n', '\n').splitlines():
+def _iter_lines(source: Union[str, TextIO]) -> Iterator[str]:
+    # Slices a string line by line instead of splitting it, so no second full copy is made
+    if isinstance(source, str):
+        start = 0
+        while start < len(source):
+            end = source.find('\n', start)
+            if end == -1:
+                end = len(source)
+            yield source[start:end].rstrip('\r')
+            start = end + 1
+    else:
+        for line in source:
+            yield line.rstrip('\r\n')
+
+def iter_markdown_sections(source: Union[str, TextIO]) -> Iterator[MarkdownSection]:
+    """Yield the sections of a markdown string or text stream one at a time.
+
+    Only the section being read is held in memory. Escaped newlines (a literal
+    backslash followed by ``n``) count as line breaks.
+    """
+    current_heading = None
+    current_heading_tag = None
+    current_level = 1
+    current_content: List[str] = []
+    for raw_line in _iter_lines(source):
+        for line in raw_line.split('\\n'):
             if line.startswith('#'):
                 if current_heading:
-                    sections.append(
-                        MarkdownSection(
-                            heading=current_heading,
-                            heading_tag=current_heading_tag,
-                            content=current_content.copy(),
-                            level=current_level,
-                        )
+                    yield MarkdownSection(
+                        heading=current_heading,
+                        heading_tag=current_heading_tag,
+                        content=current_content,
+                        level=current_level,
                     )
                 current_heading = line.strip()
-                current_heading_tag = 'h' + str(len(line) - len(line.lstrip('#')))
                 current_level = int(len(line) - len(line.lstrip('#')))
+                current_heading_tag = 'h' + str(current_level)
                 current_content = []
             else:
                 if not current_heading:
+                    # Text before any heading, its first line names the section and is also its content
                     current_heading = line.strip()
                     current_heading_tag = 'p'
-                else:
+                if current_heading:
                     current_content.append(line)
-        return sections
+    if current_heading:
+        yield MarkdownSection(
+            heading=current_heading,
+            heading_tag=current_heading_tag,
+            content=current_content,
+            level=current_level,
+        )
+
+def format_markdown_article(raw_markdown: Union[str, TextIO]) -> List[MarkdownSection]:
+    try:
+        return list(iter_markdown_sections(raw_markdown))
     except Exception as e:
         logging.error(f"Error processing markdown content: {e}")
         raise Exception("Error when formatting markdown data: " + str(e))
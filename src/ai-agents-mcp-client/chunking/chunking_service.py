@@ -1,16 +1,27 @@
 import logging
-from typing import Any
-from chunking import Document
-from chunking.document_specific_chunking import DocumentSpecificChunker
+import os
+from typing import Any, Iterator, Optional
+from chunking import Document, Section
+from chunking.document_specific_chunking import CHUNKING_MODES, DocumentSpecificChunker
+from exceptions.service_exceptions import ConfigurationError
 
 class ChunkingService:
     max_length = 200
-    def __init__(self, max_length=200) -> None:
-        self.max_length = max_length
+    def __init__(self, max_length: Optional[int] = None, mode: Optional[str] = None, overlap: Optional[int] = None) -> None:
+        # max_length and overlap are token budgets, used by the sentences mode
+        self.max_length = max_length or int(os.getenv("CHUNKING_MAX_TOKENS", 200))
+        self.mode = mode or os.getenv("CHUNKING_MODE", "lines")
+        self.overlap = overlap if overlap is not None else int(os.getenv("CHUNKING_OVERLAP_TOKENS", 0))
+        if self.mode not in CHUNKING_MODES:
+            raise ConfigurationError(f"Unknown CHUNKING_MODE: {self.mode}", "INVALID_CONFIG")
+
+    def iter_sections(self, document: Any) -> Iterator[Section]:
+        """Chunk a document section by section, without building the whole tree."""
+        return self._make_chunker().iter_sections(document)
 
     async def chunk_document(self, document: Any) -> Document:
         try:
-            chunker = DocumentSpecificChunker(self.max_length)
+            chunker = self._make_chunker()
             single_document_chunks = await chunker.create_chunks(document)
             
             if (single_document_chunks):
@@ -19,4 +30,7 @@ class ChunkingService:
             return None
         except Exception as e:
             logging.error(f"Failed to chunk document: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def _make_chunker(self) -> DocumentSpecificChunker:
+        return DocumentSpecificChunker(self.max_length, mode=self.mode, overlap=self.overlap)
@@ -1,25 +1,43 @@
 import logging
 import uuid
-from typing import List
+from typing import Iterable, Iterator, List
 
 from chunking import BaseChunker, Document, Paragraph, Section, Senetence
 from chunking.chunking_const import HEADERLEVEL
-from chunking.chunking_helper import format_markdown_article, ArticleSection, WrappingService
+from chunking.chunking_helper import iter_markdown_sections, MarkdownSection, WrappingService
+from chunking.sentence_packing import pack_sentences, split_sentences
+
+CHUNKING_MODES = ("lines", "sentences")
 
 class DocumentSpecificChunker(BaseChunker):
-    def __init__(self, max_length=100):
+    """Chunks markdown by headings.
+
+    In ``lines`` mode every line of a section is one chunk. In ``sentences`` mode
+    the section text is split into sentences that are packed into chunks of at
+    most ``max_length`` tokens, consecutive chunks sharing up to ``overlap`` tokens.
+    """
+
+    def __init__(self, max_length=100, mode="lines", overlap=0):
         super().__init__()
         self.max_length = max_length
+        self.mode = mode
+        self.overlap = overlap
         
         self.wrapper_service = WrappingService()
+
+    def make_sentences(self, lines: List[str]) -> List[Senetence]:
+        if self.mode == "sentences":
+            chunks = pack_sentences(split_sentences([str(line) for line in lines]), self.max_length, self.overlap)
+            return [Senetence(content=chunk) for chunk in chunks]
+        return [Senetence(content=str(content)) for content in lines]
     
     def get_chunking_method(self):
         return self._chunking_method
 
     async def create_chunks(self, data) -> Document:
+        """Chunk a markdown string or text stream, sections are consumed as they are read."""
         try:
-            content = format_markdown_article(data)
-            formatted_content = await self.transform_chunks_into_tree(content)
+            formatted_content = await self.transform_chunks_into_tree(iter_markdown_sections(data))
             if formatted_content:
                 return formatted_content
             return None
@@ -27,26 +45,31 @@ class DocumentSpecificChunker(BaseChunker):
             logging.error(f'Failed create chunks for document: {e}')
             return None
 
-    async def transform_chunks_into_tree(self, chunks: List[ArticleSection], ) -> Document:
+    def iter_sections(self, data) -> Iterator[Section]:
+        """Yield the chunked sections of a markdown string or text stream one at a time.
+
+        Only the section being built is held, plus the input itself when it is a string.
+        """
+        return self._build_sections(iter_markdown_sections(data))
+
+    async def transform_chunks_into_tree(self, chunks: Iterable[MarkdownSection]) -> Document:
         try: 
             tree: Document = Document()
-            current_paragraph_index = 0
-            is_create_new_section = False
-            for chunk in chunks:
-                if chunk.level == HEADERLEVEL.SECTION.value:                    
-                        section_obj = Section()
-                        parent_id = section_obj.get_id()
-                        is_create_new_section = False
-                        if chunk.content:
-                            section_obj.paragraphs.append(Paragraph(sentences=[Senetence(content=str(content)) for content in chunk.content] if chunk.content else str(chunk.heading_tag)))
-                        tree.sections.append(section_obj)
-                elif chunk.level >= HEADERLEVEL.PARAGRAPH.value:
-                    if parent_id:
-                        if is_create_new_section:
-                            current_paragraph_index += 1
-                        if chunk.content:
-                            tree.sections[current_paragraph_index].paragraphs.append(Paragraph(sentences=[Senetence(content=str(content)) for content in chunk.content] if chunk.content else str(chunk.heading_tag)))
+            tree.sections.extend(self._build_sections(chunks))
             return tree
         except Exception as e:
             logging.error(f"Error transform chunks into tree: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def _build_sections(self, chunks: Iterable[MarkdownSection]) -> Iterator[Section]:
+        section_obj = None
+        for chunk in chunks:
+            # Top level headings open a section, deeper ones add paragraphs to the open section
+            if chunk.level == HEADERLEVEL.SECTION.value or section_obj is None:
+                if section_obj is not None:
+                    yield section_obj
+                section_obj = Section()
+            if chunk.content:
+                section_obj.paragraphs.append(Paragraph(sentences=self.make_sentences(chunk.content)))
+        if section_obj is not None:
+            yield section_obj
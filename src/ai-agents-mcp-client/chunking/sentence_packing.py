@@ -0,0 +1,73 @@
+"""Sentence splitting and token-budgeted packing of sentences into chunks.
+
+Token counts come from ``core.tokenizer``; without tiktoken they are
+approximated and chunks can run over the budget by a few tokens.
+"""
+from typing import List
+import re
+
+from core.tokenizer import Tokenizer, get_tokenizer
+
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+# A period after these doesn't end a sentence. Single initials are left out, "Plan B." ends one as
+# often as "J." starts a name, and a wrong split only costs a chunk boundary where a wrong merge
+# hides a sentence.
+_ABBREVIATION = re.compile(r"\b(?:e\.g|i\.e|etc|vs|approx|incl|No|Nr|Dr|Mr|Mrs|Ms|St)\.$")
+
+def split_sentences(lines: List[str]) -> List[str]:
+    """Split text lines into sentences, every line break is also a boundary (list items, table rows)."""
+    sentences = []
+    for line in lines:
+        current = ""
+        for part in _SENTENCE_END.split(line.strip()):
+            # Rejoin splits after abbreviations and before a lowercase continuation
+            if current and (_ABBREVIATION.search(current) or part[:1].islower()):
+                current = f"{current} {part}"
+                continue
+            if current:
+                sentences.append(current)
+            current = part
+        if current:
+            sentences.append(current)
+    return sentences
+
+def pack_sentences(sentences: List[str], max_tokens: int, overlap: int = 0,
+                   tokenizer: Tokenizer = None) -> List[str]:
+    """Greedily pack consecutive sentences into chunks of at most ``max_tokens`` tokens.
+
+    A sentence longer than the budget is cut into budget-sized pieces. With
+    ``overlap`` > 0 each chunk starts with the trailing sentences of the previous
+    one that fit in ``overlap`` tokens; that text then appears in both chunks,
+    also when a paragraph is restored from them.
+    """
+    tokenizer = tokenizer or get_tokenizer()
+    pieces = []
+    for sentence in sentences:
+        tokens = tokenizer.count(sentence)
+        if tokens <= max_tokens:
+            pieces.append((sentence, tokens))
+        else:
+            pieces.extend((piece, tokenizer.count(piece)) for piece in tokenizer.split(sentence, max_tokens))
+
+    chunks: List[str] = []
+    current, current_tokens, carried = [], 0, 0
+    for piece, tokens in pieces:
+        # Separator between sentences costs about one token
+        if current_tokens + tokens + len(current) > max_tokens and len(current) > carried:
+            chunks.append(" ".join(text for text, _ in current))
+            current, current_tokens = _overlap_tail(current, overlap, max_tokens - tokens)
+            carried = len(current)
+        current.append((piece, tokens))
+        current_tokens += tokens
+    if len(current) > carried:
+        chunks.append(" ".join(text for text, _ in current))
+    return chunks
+
+def _overlap_tail(pieces, overlap: int, room: int):
+    tail, tail_tokens = [], 0
+    for piece, tokens in reversed(pieces):
+        if tail_tokens + tokens > overlap or tail_tokens + tokens + len(tail) + 1 > room:
+            break
+        tail.insert(0, (piece, tokens))
+        tail_tokens += tokens
+    return tail, tail_tokens
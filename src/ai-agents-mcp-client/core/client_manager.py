@@ -1,28 +1,131 @@
-from typing import Optional
-from mcp_client import MCPClient
+from typing import Any, Dict, List, Optional
+import os
+
+import httpx
+from mcp_client import MCPClient, create_http_client
+from core.tool_executor import ToolExecutor
+from core.tool_result_cache import ToolResultCache
+from core.single_flight import SingleFlight
+from core.llm_cache import LLMResponseCache
+from core.embedding_cache import EmbeddingCache
 
 class ClientManager:
     _instance = None
-    _mcp_client: Optional[MCPClient] = None
+    _mcp_clients: List[MCPClient] = []
+    _http_client: Optional[httpx.AsyncClient] = None
+    _tool_executor: Optional[ToolExecutor] = None
+    _tool_result_cache: Optional[ToolResultCache] = None
+    _llm_single_flight: Optional[SingleFlight] = None
+    _tool_single_flight: Optional[SingleFlight] = None
+    _llm_cache: Optional[LLMResponseCache] = None
+    _embedding_cache: Optional[EmbeddingCache] = None
+    _next_index = 0
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ClientManager, cls).__new__(cls)
         return cls._instance
 
+    @classmethod
+    def _get_http_client(cls) -> httpx.AsyncClient:
+        if cls._http_client is None:
+            cls._http_client = create_http_client()
+        return cls._http_client
+
+    @classmethod
+    def _create_mcp_client(cls) -> MCPClient:
+        # Every session shares the HTTP pool, the tool concurrency limits, the result cache
+        # and the single-flight groups, so coalescing works across the whole pool
+        if cls._tool_executor is None:
+            cls._tool_executor = ToolExecutor()
+        if cls._llm_single_flight is None:
+            cls._llm_single_flight = SingleFlight()
+        if cls._tool_single_flight is None:
+            cls._tool_single_flight = SingleFlight()
+        return MCPClient(
+            http_client=cls._get_http_client(),
+            tool_executor=cls._tool_executor,
+            tool_result_cache=cls.get_tool_result_cache(),
+            llm_single_flight=cls._llm_single_flight,
+            tool_single_flight=cls._tool_single_flight,
+            llm_cache=cls.get_llm_cache(),
+            embedding_cache=cls.get_embedding_cache(),
+        )
+
+    @classmethod
+    def get_embedding_cache(cls) -> EmbeddingCache:
+        if cls._embedding_cache is None:
+            cls._embedding_cache = EmbeddingCache()
+        return cls._embedding_cache
+
+    @classmethod
+    def get_llm_cache(cls) -> LLMResponseCache:
+        if cls._llm_cache is None:
+            cls._llm_cache = LLMResponseCache()
+        return cls._llm_cache
+
+    @classmethod
+    def get_tool_result_cache(cls) -> ToolResultCache:
+        if cls._tool_result_cache is None:
+            cls._tool_result_cache = ToolResultCache()
+        return cls._tool_result_cache
+
+    @classmethod
+    def get_pool_size(cls) -> int:
+        return max(1, int(os.getenv("MCP_SERVER_POOL_SIZE", 1)))
+
     @classmethod
     def get_mcp_client(cls) -> MCPClient:
-        if cls._mcp_client is None:
-            cls._mcp_client = MCPClient()
-        return cls._mcp_client
+        """Return the least busy MCP client of the pool.
+
+        Ties are broken round-robin so that idle sessions share the load evenly.
+        """
+        if not cls._mcp_clients:
+            cls._mcp_clients = [cls._create_mcp_client()]
+
+        clients = cls._mcp_clients
+        start = cls._next_index % len(clients)
+        cls._next_index = start + 1
+        return min(
+            (clients[(start + offset) % len(clients)] for offset in range(len(clients))),
+            key=lambda client: client.in_flight,
+        )
+
+    @classmethod
+    async def initialize(cls, server_script_path: Optional[str] = None, server_url: Optional[str] = None):
+        """Open the session pool, either over HTTP to a shared server or to local stdio subprocesses."""
+        cls._mcp_clients = [cls._create_mcp_client() for _ in range(cls.get_pool_size())]
+        # Each session's transport is opened, closed and reopened by its own owner task,
+        # anyio cancel scopes must be entered and exited by the same task.
+        for client in cls._mcp_clients:
+            if server_url:
+                await client.connect_to_url(server_url)
+            else:
+                await client.connect_to_server(server_script_path)
+
+    @classmethod
+    def get_single_flight_stats(cls) -> Dict[str, Any]:
+        return {
+            "llm": cls._llm_single_flight.get_stats() if cls._llm_single_flight else None,
+            "tools": cls._tool_single_flight.get_stats() if cls._tool_single_flight else None,
+        }
 
     @classmethod
-    async def initialize(cls, server_script_path: str):
-        client = cls.get_mcp_client()
-        await client.connect_to_server(server_script_path)
+    def get_session_stats(cls) -> List[Dict[str, Any]]:
+        return [
+            {"index": index, **client.get_stats()}
+            for index, client in enumerate(cls._mcp_clients)
+        ]
 
     @classmethod
     async def cleanup(cls):
-        if cls._mcp_client:
-            await cls._mcp_client.exit_stack.aclose()
-            cls._mcp_client = None 
\ No newline at end of file
+        for client in cls._mcp_clients:
+            await client.cleanup()
+        cls._mcp_clients = []
+        if cls._llm_cache is not None:
+            cls._llm_cache.close()
+        if cls._embedding_cache is not None:
+            cls._embedding_cache.close()
+        if cls._http_client is not None:
+            await cls._http_client.aclose()
+            cls._http_client = None
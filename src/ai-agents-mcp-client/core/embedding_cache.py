@@ -0,0 +1,143 @@
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """Persistent content-addressed store of embedding vectors.
+
+    Vectors are keyed by (model, dimensions, sha256(text)) and stored as raw
+    float32 or float16 bytes in SQLite (``EMBEDDING_CACHE_PATH``). The store is
+    bounded by ``EMBEDDING_CACHE_MAX_ENTRIES`` and evicts least recently used rows.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: Optional[int] = None, dtype: Optional[str] = None):
+        self.db_path = db_path or os.getenv("EMBEDDING_CACHE_PATH") or None
+        self.max_entries = max_entries or int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 1000000))
+        self.dtype = np.dtype(dtype or os.getenv("EMBEDDING_CACHE_DTYPE", "float32"))
+        if self.dtype not in (np.dtype("float32"), np.dtype("float16")):
+            raise ValueError(f"Unsupported embedding cache dtype: {self.dtype}")
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.db_path)
+
+    @staticmethod
+    def hash_text(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    dimensions INTEGER NOT NULL,
+                    text_hash BLOB NOT NULL,
+                    dtype TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (model, dimensions, text_hash)
+                ) WITHOUT ROWID"""
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)")
+            self._connection.commit()
+        return self._connection
+
+    def _get_many(self, model: str, dimensions: int, hashes: List[bytes]) -> Dict[bytes, List[float]]:
+        found = {}
+        with self._lock:
+            connection = self._get_connection()
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = connection.execute(
+                    f"SELECT text_hash, dtype, vector FROM embeddings WHERE model = ? AND dimensions = ? AND text_hash IN ({placeholders})",
+                    (model, dimensions, *chunk),
+                ).fetchall()
+                for text_hash, dtype, vector in rows:
+                    found[text_hash] = np.frombuffer(vector, dtype=dtype).astype(np.float32).tolist()
+            if found:
+                connection.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND dimensions = ? AND text_hash = ?",
+                    [(time.time(), model, dimensions, text_hash) for text_hash in found],
+                )
+                connection.commit()
+        return found
+
+    def _set_many(self, model: str, dimensions: int, hashes: List[bytes], vectors: Sequence[Sequence[float]]):
+        now = time.time()
+        with self._lock:
+            connection = self._get_connection()
+            connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, dimensions, text_hash, dtype, vector, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (model, dimensions, text_hash, self.dtype.name, np.asarray(vector, dtype=self.dtype).tobytes(), now)
+                    for text_hash, vector in zip(hashes, vectors)
+                ],
+            )
+            self._writes += len(hashes)
+            # Eviction scans the table, so only do it once every few thousand vectors
+            if self._writes >= 4096:
+                self._writes = 0
+                connection.execute(
+                    "DELETE FROM embeddings WHERE (model, dimensions, text_hash) IN "
+                    "(SELECT model, dimensions, text_hash FROM embeddings ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            connection.commit()
+
+    async def get_many(self, model: str, dimensions: int, texts: List[str]) -> List[Optional[List[float]]]:
+        """Return the cached vector of every text, or None where it is not cached."""
+        if not self.enabled or not texts:
+            return [None] * len(texts)
+
+        hashes = [self.hash_text(text) for text in texts]
+        try:
+            found = await asyncio.to_thread(self._get_many, model, dimensions, list(set(hashes)))
+        except Exception as e:
+            logger.error(f"Failed to read embedding cache: {e}")
+            found = {}
+
+        vectors = [found.get(text_hash) for text_hash in hashes]
+        hits = sum(vector is not None for vector in vectors)
+        self.hits += hits
+        self.misses += len(vectors) - hits
+        return vectors
+
+    async def set_many(self, model: str, dimensions: int, texts: List[str], vectors: Sequence[Sequence[float]]):
+        if not self.enabled or not texts:
+            return
+        try:
+            await asyncio.to_thread(self._set_many, model, dimensions, [self.hash_text(text) for text in texts], vectors)
+        except Exception as e:
+            logger.error(f"Failed to write embedding cache: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "dtype": self.dtype.name,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,310 @@
+"""In-process background jobs with a pluggable store.
+
+Work submitted to the ``JobQueue`` is recorded in a ``JobStore`` and picked up by
+a fixed pool of worker tasks, so the caller gets a job ID back immediately and
+the pool size bounds how much background work competes with interactive
+requests. Handlers report the stage they are in, the queue keeps per-stage
+completion and failure counts.
+
+``JOB_QUEUE_BACKEND=sqlite`` keeps jobs in ``JOB_QUEUE_PATH``: jobs still queued
+or running when the process stopped are picked up again on the next start.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from exceptions.service_exceptions import CapacityError, ConfigurationError, NotFoundError
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: Dict[str, Any]
+    status: str = QUEUED
+    stage: Optional[str] = None
+    # Handler reported counters, e.g. documents to embed
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+# Reports the stage a job entered together with progress counters
+ProgressCallback = Callable[..., Awaitable[None]]
+JobHandler = Callable[[Dict[str, Any], ProgressCallback], Awaitable[Any]]
+
+class JobStore(ABC):
+    @abstractmethod
+    async def save(self, job: Job):
+        """Insert or replace a job."""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    async def list_unfinished(self) -> List[Job]:
+        """Queued and running jobs, oldest first."""
+
+    def close(self):
+        pass
+
+class InMemoryJobStore(JobStore):
+    """Jobs live as long as the process, only the newest ``max_finished`` finished jobs are kept."""
+
+    def __init__(self, max_finished: Optional[int] = None):
+        self.max_finished = max_finished or int(os.getenv("JOB_QUEUE_MAX_FINISHED", 10000))
+        self._jobs: Dict[str, Job] = {}
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+
+    async def save(self, job: Job):
+        self._jobs[job.id] = job
+        if job.status in FINISHED:
+            self._finished[job.id] = None
+            while len(self._finished) > self.max_finished:
+                self._jobs.pop(self._finished.popitem(last=False)[0], None)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def list_unfinished(self) -> List[Job]:
+        return sorted((job for job in self._jobs.values() if job.status not in FINISHED), key=lambda job: job.created_at)
+
+class SQLiteJobStore(JobStore):
+    """Jobs persisted in SQLite, finished jobs are pruned after ``retention`` seconds."""
+
+    def __init__(self, db_path: str, retention: Optional[float] = None):
+        self.db_path = db_path
+        self.retention = retention or float(os.getenv("JOB_QUEUE_RETENTION", 7 * 86400))
+        self._connection: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    finished_at REAL,
+                    job TEXT NOT NULL
+                )"""
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            self._connection.commit()
+        return self._connection
+
+    def _write(self, job: Job):
+        with self._db_lock:
+            connection = self._get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, created_at, finished_at, job) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.status, job.created_at, job.finished_at, json.dumps(job.to_dict(), default=str)),
+            )
+            self._writes += 1
+            # Pruning scans the table, so only do it every few hundred writes
+            if self._writes % 256 == 0:
+                connection.execute("DELETE FROM jobs WHERE finished_at <= ?", (time.time() - self.retention,))
+            connection.commit()
+
+    def _read(self, job_id: str) -> Optional[Job]:
+        with self._db_lock:
+            row = self._get_connection().execute("SELECT job FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(**json.loads(row[0])) if row else None
+
+    def _read_unfinished(self) -> List[Job]:
+        with self._db_lock:
+            rows = self._get_connection().execute(
+                "SELECT job FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [Job(**json.loads(row[0])) for row in rows]
+
+    async def save(self, job: Job):
+        await asyncio.to_thread(self._write, job)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self._read, job_id)
+
+    async def list_unfinished(self) -> List[Job]:
+        return await asyncio.to_thread(self._read_unfinished)
+
+    def close(self):
+        with self._db_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+def create_job_store() -> JobStore:
+    backend = os.getenv("JOB_QUEUE_BACKEND", "memory")
+    if backend == "memory":
+        return InMemoryJobStore()
+    if backend == "sqlite":
+        return SQLiteJobStore(os.getenv("JOB_QUEUE_PATH") or "jobs.sqlite3")
+    raise ConfigurationError(f"Unknown JOB_QUEUE_BACKEND: {backend}", "INVALID_CONFIG")
+
+class JobQueue:
+    def __init__(self, store: Optional[JobStore] = None, workers: Optional[int] = None,
+                 max_queued: Optional[int] = None):
+        self.store = store or create_job_store()
+        self.workers = workers or int(os.getenv("JOB_QUEUE_WORKERS", 2))
+        self.max_queued = max_queued or int(os.getenv("JOB_QUEUE_MAX_QUEUED", 1000))
+        self._handlers: Dict[str, JobHandler] = {}
+        # Queued and running jobs, the source of truth while they are live
+        self._active: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.status_counts = {SUCCEEDED: 0, FAILED: 0}
+        # stage -> {"completed": n, "failed": n}
+        self.stage_counts: Dict[str, Dict[str, int]] = {}
+
+    def register(self, kind: str, handler: JobHandler):
+        self._handlers[kind] = handler
+
+    async def start(self):
+        """Start the workers and resume jobs left unfinished by a previous process."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        for job in await self.store.list_unfinished():
+            job.status, job.stage, job.started_at = QUEUED, None, None
+            self._active[job.id] = job
+            self._queue.put_nowait(job.id)
+        if self._active:
+            logger.info(f"Resuming {len(self._active)} unfinished jobs")
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def submit(self, kind: str, payload: Dict[str, Any]) -> Job:
+        if kind not in self._handlers:
+            raise ConfigurationError(f"No handler registered for job kind '{kind}'", "INVALID_CONFIG")
+        if self._queue is None:
+            await self.start()
+        if self._queue.qsize() >= self.max_queued:
+            raise CapacityError(f"Job queue is full ({self.max_queued} queued jobs)", "JOB_QUEUE_FULL")
+        job = Job(id=str(uuid.uuid4()), kind=kind, payload=payload)
+        await self.store.save(job)
+        self._active[job.id] = job
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def get(self, job_id: str) -> Job:
+        job = self._active.get(job_id) or await self.store.get(job_id)
+        if job is None:
+            raise NotFoundError(f"Job {job_id} not found", "JOB_NOT_FOUND")
+        return job
+
+    def _count_stage(self, stage: Optional[str], outcome: str):
+        if stage is not None:
+            counts = self.stage_counts.setdefault(stage, {"completed": 0, "failed": 0})
+            counts[outcome] += 1
+
+    async def _work(self):
+        while True:
+            job = self._active[await self._queue.get()]
+            try:
+                await self._run(job)
+            finally:
+                del self._active[job.id]
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        async def report(stage: str, **progress):
+            self._count_stage(job.stage, "completed")
+            job.stage = stage
+            job.progress.update(progress)
+            await self.store.save(job)
+
+        job.status, job.started_at = RUNNING, time.time()
+        try:
+            # A store error here fails the job, not the worker running it
+            await self.store.save(job)
+            handler = self._handlers.get(job.kind)
+            if handler is None:
+                raise ConfigurationError(f"No handler registered for job kind '{job.kind}'", "INVALID_CONFIG")
+            job.result = await handler(job.payload, report)
+            self._count_stage(job.stage, "completed")
+            job.status = SUCCEEDED
+        except Exception as e:
+            self._count_stage(job.stage, "failed")
+            job.status, job.error = FAILED, str(e)
+            logger.error(f"Job {job.id} ({job.kind}) failed in stage {job.stage}: {str(e)}")
+        job.finished_at = time.time()
+        self.status_counts[job.status] += 1
+        try:
+            await self.store.save(job)
+        except Exception as e:
+            logger.error(f"Failed to save job {job.id}: {str(e)}")
+
+    async def join(self):
+        """Wait until every submitted job has finished."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        # Unfinished jobs stay in the store, a persistent store resumes them on the next start
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._active = {}
+        self.store.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        statuses = [job.status for job in self._active.values()]
+        return {
+            "workers": self.workers,
+            "queued": statuses.count(QUEUED),
+            "running": statuses.count(RUNNING),
+            **self.status_counts,
+            "stages": self.stage_counts,
+        }
+
+class JobManager:
+    _queue: Optional[JobQueue] = None
+
+    @classmethod
+    def get_queue(cls) -> JobQueue:
+        if cls._queue is None:
+            cls._queue = JobQueue()
+        return cls._queue
+
+    @classmethod
+    async def initialize(cls, handlers: Dict[str, JobHandler]):
+        queue = cls.get_queue()
+        for kind, handler in handlers.items():
+            queue.register(kind, handler)
+        await queue.start()
+
+    @classmethod
+    def get_stats(cls) -> Optional[Dict[str, Any]]:
+        return cls._queue.get_stats() if cls._queue is not None else None
+
+    @classmethod
+    async def cleanup(cls):
+        if cls._queue is not None:
+            await cls._queue.close()
+            cls._queue = None
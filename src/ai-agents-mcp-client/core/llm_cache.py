@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from openai.types.chat import ChatCompletion
+
+from core.settings import parse_named_settings
+
+logger = logging.getLogger(__name__)
+
+class LLMResponseCache:
+    """Exact-match cache for chat completions with a memory LRU and an SQLite tier.
+
+    Caching is opt-in per endpoint: ``LLM_CACHE_ENDPOINTS="categorize_product:86400,..."``
+    lists the endpoints allowed to use it together with their TTL in seconds. The
+    SQLite tier is enabled when ``LLM_CACHE_PATH`` is set.
+    """
+
+    def __init__(self, endpoint_ttls: Optional[Dict[str, float]] = None, max_memory_entries: Optional[int] = None,
+                 db_path: Optional[str] = None, max_disk_entries: Optional[int] = None):
+        self.endpoint_ttls = endpoint_ttls if endpoint_ttls is not None else parse_named_settings(os.getenv("LLM_CACHE_ENDPOINTS", ""), float)
+        self.max_memory_entries = max_memory_entries or int(os.getenv("LLM_CACHE_MAX_MEMORY_ENTRIES", 512))
+        self.db_path = db_path or os.getenv("LLM_CACHE_PATH") or None
+        self.max_disk_entries = max_disk_entries or int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", 100000))
+        # key -> (expires_at, response)
+        self._memory: "OrderedDict[str, Tuple[float, ChatCompletion]]" = OrderedDict()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._disk_writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def is_enabled_for(self, endpoint: Optional[str]) -> bool:
+        return endpoint is not None and endpoint in self.endpoint_ttls
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    endpoint TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    response TEXT NOT NULL
+                )"""
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+            self._connection.commit()
+        return self._connection
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._db_lock:
+            connection = self._get_connection()
+            row = connection.execute("SELECT expires_at, response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[0] <= time.time():
+                connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                connection.commit()
+                return None
+            connection.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            connection.commit()
+            return row
+
+    def _write_disk(self, endpoint: str, key: str, expires_at: float, response: str):
+        with self._db_lock:
+            connection = self._get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, endpoint, expires_at, last_access, response) VALUES (?, ?, ?, ?, ?)",
+                (key, endpoint, expires_at, time.time(), response),
+            )
+            self._disk_writes += 1
+            # Pruning scans the table, so only do it every few hundred writes
+            if self._disk_writes % 256 == 0:
+                connection.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+                connection.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+            connection.commit()
+
+    def _remember(self, key: str, expires_at: float, response: ChatCompletion):
+        self._memory[key] = (expires_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[ChatCompletion]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            del self._memory[key]
+
+        if self.db_path:
+            try:
+                row = await asyncio.to_thread(self._read_disk, key)
+            except Exception as e:
+                logger.error(f"Failed to read LLM cache: {e}")
+                row = None
+            if row is not None:
+                response = ChatCompletion.model_validate_json(row[1])
+                self._remember(key, row[0], response)
+                self.disk_hits += 1
+                return response
+
+        self.misses += 1
+        return None
+
+    async def set(self, endpoint: str, key: str, response: ChatCompletion):
+        expires_at = time.time() + self.endpoint_ttls[endpoint]
+        self._remember(key, expires_at, response)
+        if self.db_path:
+            try:
+                await asyncio.to_thread(self._write_disk, endpoint, key, expires_at, response.model_dump_json())
+            except Exception as e:
+                logger.error(f"Failed to write LLM cache: {e}")
+
+    def close(self):
+        with self._db_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "endpoints": sorted(self.endpoint_ttls),
+            "memory_size": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "disk_enabled": bool(self.db_path),
+        }
@@ -0,0 +1,10 @@
+from typing import Any, Callable, Dict
+
+def parse_named_settings(raw: str, cast: Callable[[str], Any] = int) -> Dict[str, Any]:
+    """Parse "name_a:2,name_b:1" into {"name_a": 2, "name_b": 1}."""
+    settings = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        name, _, value = item.partition(":")
+        if value:
+            settings[name.strip()] = cast(value.strip())
+    return settings
@@ -0,0 +1,66 @@
+"""Token counting for embedding inputs.
+
+Token counts come from tiktoken's ``cl100k_base``, the encoding of the
+text-embedding-3 models, when it is installed (it comes with langchain-openai).
+Otherwise a regex approximates them: one token per word or punctuation mark,
+and one per character in scripts written without spaces (CJK, Thai, ...). That
+is close for common English words but under-counts long or rare words and some
+CJK characters, so text can run over a budget by a few tokens.
+"""
+from functools import lru_cache
+from typing import List
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Han, kana, Hangul, Thai, Lao, Myanmar and Khmer count per character, cl100k spends a token or more on each
+_NO_SPACE_SCRIPT = "\u0e00-\u0eff\u1000-\u109f\u1780-\u17ff\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_WORD_OR_MARK = re.compile(rf"[{_NO_SPACE_SCRIPT}]|[^\W{_NO_SPACE_SCRIPT}]+|[^\w\s]")
+
+class Tokenizer:
+    def __init__(self, encoding=None):
+        self._encoding = encoding
+
+    @property
+    def name(self) -> str:
+        return self._encoding.name if self._encoding is not None else "regex"
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return len(_WORD_OR_MARK.findall(text))
+
+    def split(self, text: str, max_tokens: int) -> List[str]:
+        """Cut text into consecutive pieces of at most ``max_tokens`` tokens."""
+        if self._encoding is not None:
+            # Cut at the character offsets of token boundaries, decoding a token slice could split a
+            # multi-byte character
+            _, offsets = self._encoding.decode_with_offsets(self._encoding.encode(text))
+            offsets.append(len(text))
+            pieces, first = [], 0
+            while first < len(offsets) - 1:
+                start = offsets[first]
+                last = min(first + max_tokens, len(offsets) - 1)
+                # Re-encoding a cut piece can take a token more than its slice did
+                while last > first + 1 and self.count(text[start:offsets[last]]) > max_tokens:
+                    last -= 1
+                # A character whose bytes span more tokens than the budget still goes whole
+                while offsets[last] <= start:
+                    last += 1
+                pieces.append(text[start:offsets[last]].strip())
+                first = last
+            return [piece for piece in pieces if piece]
+        spans = [match.span() for match in _WORD_OR_MARK.finditer(text)]
+        return [text[spans[start][0]:spans[min(start + max_tokens, len(spans)) - 1][1]]
+                for start in range(0, len(spans), max_tokens)]
+
+@lru_cache(maxsize=1)
+def get_tokenizer() -> Tokenizer:
+    try:
+        import tiktoken
+        return Tokenizer(tiktoken.get_encoding("cl100k_base"))
+    except Exception as e:
+        # Not installed, or the encoding file can't be downloaded
+        logger.warning(f"tiktoken unavailable ({str(e)}), approximating token counts")
+        return Tokenizer()
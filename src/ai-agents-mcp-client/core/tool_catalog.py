@@ -0,0 +1,47 @@
+from typing import Any, Dict, List
+
+from mcp.types import Tool
+
+class ToolCatalog:
+    """Pre-rendered view of the tools exposed by an MCP server.
+
+    Rendering happens once per tool-list change instead of once per request, and
+    the rendered lists are replaced (never mutated) so a request can keep using
+    the snapshot it read.
+    """
+
+    def __init__(self):
+        self.tools: List[Tool] = []
+        self.openai_tools: List[Dict[str, Any]] = []
+        self.tools_prompt: str = ""
+        self.loaded = False
+        self.version = 0
+
+    def load(self, tools: List[Tool]):
+        openai_tools = [{
+            "type": "function",
+            "function": {
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": tool.inputSchema
+            }
+        } for tool in tools]
+
+        tools_prompt = "Available tools:\n"
+        for index, tool in enumerate(openai_tools):
+            tools_prompt += f"""
+                {index + 1}/{len(openai_tools)}:
+                    - Tool name: {tool['function']['name']}
+                    - Tool description: {tool['function']['description']}
+                    - Tool input schema: {tool['function']['parameters']}
+                \n
+                """
+
+        self.tools = list(tools)
+        self.openai_tools = openai_tools
+        self.tools_prompt = tools_prompt
+        self.loaded = True
+        self.version += 1
+
+    def get_tool_names(self) -> List[str]:
+        return [tool.name for tool in self.tools]
@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+
+from core.settings import parse_named_settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ToolCallResult:
+    tool_call: Any
+    result: Any = None
+    error: Optional[Exception] = None
+
+    @property
+    def content(self):
+        if self.error is not None:
+            return f"Tool {self.tool_call.function.name} failed: {self.error}"
+        return self.result.content if self.result is not None else ""
+
+class ToolExecutor:
+    """Runs the tool calls of one model turn concurrently.
+
+    A global semaphore caps the number of tool calls in flight across every
+    request, and one semaphore per tool name caps how hard a single tool is hit.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, max_concurrency_per_tool: Optional[int] = None,
+                 tool_limits: Optional[Dict[str, int]] = None):
+        self.max_concurrency = max_concurrency or int(os.getenv("MCP_TOOL_CONCURRENCY", 8))
+        self.max_concurrency_per_tool = max_concurrency_per_tool or int(os.getenv("MCP_TOOL_CONCURRENCY_PER_TOOL", 4))
+        self.tool_limits = tool_limits if tool_limits is not None else parse_named_settings(os.getenv("MCP_TOOL_CONCURRENCY_LIMITS", ""))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._tool_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_tool_semaphore(self, tool_name: str) -> asyncio.Semaphore:
+        if tool_name not in self._tool_semaphores:
+            limit = self.tool_limits.get(tool_name, self.max_concurrency_per_tool)
+            self._tool_semaphores[tool_name] = asyncio.Semaphore(limit)
+        return self._tool_semaphores[tool_name]
+
+    async def _execute_one(self, call_tool: Callable[[str, Dict[str, Any]], Awaitable[Any]], tool_call) -> ToolCallResult:
+        tool_name = tool_call.function.name
+        try:
+            tool_args = json.loads(tool_call.function.arguments or "{}")
+            async with self._get_tool_semaphore(tool_name), self._semaphore:
+                result = await call_tool(tool_name, tool_args)
+            logger.info(f"Tool call result: {result}")
+            return ToolCallResult(tool_call=tool_call, result=result)
+        except Exception as e:
+            logger.error(f"Tool call {tool_name} failed: {e}")
+            return ToolCallResult(tool_call=tool_call, error=e)
+
+    async def execute(self, call_tool: Callable[[str, Dict[str, Any]], Awaitable[Any]], tool_calls) -> List[ToolCallResult]:
+        """Execute every tool call and return the results in the order of ``tool_calls``."""
+        if not tool_calls:
+            return []
+        return list(await asyncio.gather(*(self._execute_one(call_tool, tool_call) for tool_call in tool_calls)))
+
+def build_tool_messages(results: List[ToolCallResult]) -> List[Dict[str, Any]]:
+    """Build the assistant tool-call message followed by one tool message per call."""
+    if not results:
+        return []
+
+    messages = [{
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+            {
+                "id": result.tool_call.id,
+                "type": "function",
+                "function": {
+                    "name": result.tool_call.function.name,
+                    "arguments": result.tool_call.function.arguments
+                }
+            } for result in results
+        ]
+    }]
+    for result in results:
+        messages.append({
+            "tool_call_id": result.tool_call.id,
+            "role": "tool",
+            "content": result.content,
+        })
+    return messages
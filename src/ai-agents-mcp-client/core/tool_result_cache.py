@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+import json
+import logging
+import os
+import time
+
+from core.settings import parse_named_settings
+
+logger = logging.getLogger(__name__)
+
+class ToolResultCache:
+    """TTL + LRU cache for the results of read-only MCP tools.
+
+    Only tools listed in the allowlist (``MCP_TOOL_CACHE_TOOLS="get_customer:300,..."``,
+    values are TTLs in seconds) are cached, so mutating tools always reach the server.
+    The cache is disabled when the allowlist is empty.
+    """
+
+    def __init__(self, tool_ttls: Optional[Dict[str, float]] = None, max_entries: Optional[int] = None):
+        self.tool_ttls = tool_ttls if tool_ttls is not None else parse_named_settings(os.getenv("MCP_TOOL_CACHE_TOOLS", ""), float)
+        self.max_entries = max_entries or int(os.getenv("MCP_TOOL_CACHE_MAX_ENTRIES", 1024))
+        # key -> (expires_at, identifying values of the arguments, result)
+        self._entries: "OrderedDict[str, Tuple[float, Set[str], Any]]" = OrderedDict()
+        # Bumped by every invalidation; identifier -> generation it was last invalidated in
+        self._generation = 0
+        self._invalidated_at: "OrderedDict[str, int]" = OrderedDict()
+        # Reads started before this generation may miss a forgotten identifier and are never cached
+        self._oldest_cacheable = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_results = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.tool_ttls)
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        return tool_name in self.tool_ttls
+
+    @staticmethod
+    def make_key(tool_name: str, arguments: Optional[Dict[str, Any]]) -> str:
+        canonical_arguments = json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), default=str)
+        return f"{tool_name}:{canonical_arguments}"
+
+    @staticmethod
+    def _identifying_values(arguments: Any) -> Set[str]:
+        """Collect the values of id-like keys (``id``, ``product_id``, ``customerId``...)."""
+        values = set()
+        if isinstance(arguments, dict):
+            for key, value in arguments.items():
+                if isinstance(value, (dict, list)):
+                    values |= ToolResultCache._identifying_values(value)
+                elif value is not None and (key.lower() == "id" or key.lower().endswith("_id") or key.endswith("Id")):
+                    values.add(str(value))
+        elif isinstance(arguments, list):
+            for item in arguments:
+                values |= ToolResultCache._identifying_values(item)
+        return values
+
+    def get(self, tool_name: str, arguments: Optional[Dict[str, Any]]) -> Tuple[bool, Any]:
+        key = self.make_key(tool_name, arguments)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        expires_at, _, result = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, result
+
+    def start_read(self) -> int:
+        """Generation to pass to ``set`` for a result fetched from now on."""
+        return self._generation
+
+    def set(self, tool_name: str, arguments: Optional[Dict[str, Any]], result: Any,
+            generation: Optional[int] = None):
+        if not self.is_cacheable(tool_name):
+            return
+
+        identifiers = self._identifying_values(arguments)
+        # A read that was in flight while its customer or product changed returns the old state
+        if generation is not None and (
+            generation < self._oldest_cacheable
+            or any(self._invalidated_at.get(value, -1) >= generation for value in identifiers)
+        ):
+            self.stale_results += 1
+            return
+
+        key = self.make_key(tool_name, arguments)
+        expires_at = time.monotonic() + self.tool_ttls[tool_name]
+        self._entries[key] = (expires_at, identifiers, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate_matching(self, arguments: Dict[str, Any]) -> int:
+        """Drop every entry that shares an identifier with the arguments of a mutation."""
+        identifiers = self._identifying_values(arguments)
+        if not identifiers:
+            return 0
+
+        for value in identifiers:
+            self._invalidated_at[value] = self._generation
+            self._invalidated_at.move_to_end(value)
+        self._generation += 1
+        while len(self._invalidated_at) > self.max_entries:
+            self._oldest_cacheable = self._invalidated_at.popitem(last=False)[1] + 1
+
+        stale_keys = [key for key, (_, values, _) in self._entries.items() if values & identifiers]
+        for key in stale_keys:
+            del self._entries[key]
+        self.invalidations += len(stale_keys)
+        if stale_keys:
+            logger.info(f"Invalidated {len(stale_keys)} cached tool results for {sorted(identifiers)}")
+        return len(stale_keys)
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_results": self.stale_results,
+        }
@@ -1,79 +1,267 @@
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Union
+import asyncio
+import functools
+import hashlib
 import os
 import uuid
-import pinecone
-from pinecone.grpc import PineconeGRPC, GRPCClientConfig
+
+from core.vector_store import NumpyVectorStore, PineconeVectorStore, VectorStore
+from core.vector_write_buffer import VectorWriteBuffer, WriteTicket
+from exceptions.service_exceptions import ConfigurationError, VectorDatabaseError
 
 from dotenv import load_dotenv
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Collections map to index namespaces, product vectors live in this one
+DEFAULT_COLLECTION = "vector_products"
+
+def vector_id_prefix(product_id: str) -> str:
+    """Prefix shared by every vector ID of a product, so they can be listed.
+
+    ``#`` and ``%`` in the product ID are percent-escaped, otherwise the prefix of
+    product ``a`` would also match the IDs of product ``a#b``.
+    """
+    return product_id.replace("%", "%25").replace("#", "%23") + "#"
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+
+def make_vector_id(product_id: str, level: str, content: str) -> str:
+    """Stable vector ID, unchanged content of a product always maps to the same vector."""
+    return f"{vector_id_prefix(product_id)}{level}:{content_hash(content)}"
+
 class VectorDatabase:
     _instance = None
-    _index = None
+    _store: Optional[VectorStore] = None
+    _executor: Optional[ThreadPoolExecutor] = None
+    _timeout: float = 10.0
+    _snapshot_path: Optional[str] = None
+    _write_buffer: Optional[VectorWriteBuffer] = None
+    dimension = 3072
 
     @classmethod
     def initialize(cls):
-        api_key = os.getenv("PINECONE_API_KEY")
-        environment = os.getenv("PINECONE_ENVIRONMENT")
-        index_name = os.getenv("PINECONE_INDEX_NAME", "vector_index")
-        host = os.getenv("PINECONE_HOST", "http://localhost:5080")  
-
-        pinecone_client = PineconeGRPC(api_key=api_key, host=host)
-
-        index_spec = {
-            "serverless": {
-                "cloud": "aws",
-                "region": "us-east-1"
-            }
-        }
-        indexes = pinecone_client.list_indexes()
+        backend = os.getenv("VECTOR_DB_BACKEND", "pinecone")
+        # Must match the width embed_texts requests from the embeddings API
+        cls.dimension = int(os.getenv("EMBEDDING_DIMENSIONS", 0)) or 3072
 
-        if not any(idx.get("name") == index_name for idx in indexes):
-            pinecone_client.create_index(index_name, dimension=3072, metric="cosine", spec=index_spec)
+        # Only a store that passed its checks is published, a failed initialize leaves none behind
+        if backend == "pinecone":
+            store = PineconeVectorStore(
+                api_key=os.getenv("PINECONE_API_KEY"),
+                host=os.getenv("PINECONE_HOST", "http://localhost:5080"),
+                index_name=os.getenv("PINECONE_INDEX_NAME", "vector_index"),
+                dimension=cls.dimension,
+            )
+            if store.dimension != cls.dimension:
+                store.close()
+                raise ConfigurationError(
+                    f"Pinecone index dimension {store.dimension} does not match {cls.dimension}", "INVALID_CONFIG"
+                )
+        elif backend == "numpy":
+            store = cls._open_numpy_store()
         else:
-            logger.info(f"Index '{index_name}' already exists. Skipping creation.")
-        
-        cls._index = pinecone_client.Index(index_name, grpc_config=GRPCClientConfig(secure=False))
-        logger.info("Pinecone index initialized successfully")
+            raise ConfigurationError(f"Unknown VECTOR_DB_BACKEND: {backend}", "INVALID_CONFIG")
+        cls._store = store
+
+        # Backends are blocking, calls run on a bounded pool so they never stall the event loop
+        cls._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("VECTOR_DB_MAX_WORKERS", 8)),
+            thread_name_prefix="vector-db",
+        )
+        cls._timeout = float(os.getenv("VECTOR_DB_TIMEOUT", 10))
+        if os.getenv("VECTOR_DB_WRITE_BEHIND", "true").lower() == "true":
+            cls._write_buffer = VectorWriteBuffer(
+                write=lambda vectors, namespace: cls._run(lambda: cls._store.upsert(vectors, namespace=namespace))
+            )
+        logger.info(f"Vector store '{backend}' initialized successfully")
         return True
 
     @classmethod
-    def store_embedding(cls, collection_name: str, embedding: List[float], metadata: Dict[Any, Any] = None) -> str:
-        if cls._index is None:
-            raise ValueError("Pinecone index not initialized. Call initialize() first.")
+    def _open_numpy_store(cls) -> NumpyVectorStore:
+        cls._snapshot_path = os.getenv("VECTOR_DB_SNAPSHOT_PATH") or None
+        mode = os.getenv("VECTOR_DB_SNAPSHOT_MODE", "read-write")
+        if mode not in ("read-only", "read-write"):
+            raise ConfigurationError(f"Unknown VECTOR_DB_SNAPSHOT_MODE: {mode}", "INVALID_CONFIG")
+
+        if cls._snapshot_path:
+            # Snapshots of the single-matrix store only ever held product vectors
+            NumpyVectorStore.migrate_flat_snapshot(cls._snapshot_path, DEFAULT_COLLECTION)
+        if cls._snapshot_path and NumpyVectorStore.snapshot_exists(cls._snapshot_path):
+            store = NumpyVectorStore.from_snapshot(cls._snapshot_path, read_only=mode == "read-only")
+            if store.dimension != cls.dimension:
+                raise ConfigurationError(
+                    f"Vector snapshot dimension {store.dimension} does not match {cls.dimension}", "INVALID_CONFIG"
+                )
+            return store
+        if mode == "read-only":
+            raise ConfigurationError("VECTOR_DB_SNAPSHOT_MODE=read-only requires an existing VECTOR_DB_SNAPSHOT_PATH", "INVALID_CONFIG")
+        return NumpyVectorStore(dimension=cls.dimension, dtype=os.getenv("VECTOR_DB_DTYPE", "float32"))
+
+    @classmethod
+    async def export_snapshot(cls, path: Optional[str] = None, full: bool = False,
+                              timeout: Optional[float] = None) -> int:
+        """Persist the in-process store so the next start can map it instead of re-ingesting.
+
+        ``full`` rewrites the snapshot with only live vectors instead of appending changes.
+        """
+        if not isinstance(cls._store, NumpyVectorStore):
+            raise VectorDatabaseError("Snapshots are only supported by the numpy backend", "VECTOR_DB_UNSUPPORTED")
+        path = path or cls._snapshot_path
+        if not path:
+            raise ConfigurationError("VECTOR_DB_SNAPSHOT_PATH is not set", "MISSING_CONFIG")
+        await cls.flush()
+        return await cls._run(lambda: cls._store.export_snapshot(path, full=full), timeout=timeout)
+
+    @classmethod
+    async def _run(cls, fn, *args, timeout: Optional[float] = None, **kwargs):
+        if cls._store is None:
+            raise ValueError("Vector store not initialized. Call initialize() first.")
 
-        vector_id = str(uuid.uuid4())
-        cls._index.upsert([{
+        timeout = timeout or cls._timeout
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(cls._executor, functools.partial(fn, *args, **kwargs)),
+                timeout,
+            )
+        except asyncio.TimeoutError as e:
+            raise VectorDatabaseError(f"Vector database call timed out after {timeout}s", "VECTOR_DB_TIMEOUT") from e
+
+    @classmethod
+    async def store_embedding(cls, collection_name: str, embedding: List[float], metadata: Dict[Any, Any] = None,
+                              vector_id: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        vector_id = vector_id or str(uuid.uuid4())
+        await cls._run(lambda: cls._store.upsert([{
             "id": vector_id,
             "values": embedding,
             "metadata": metadata
-        }])
+        }], namespace=collection_name), timeout=timeout)
         return vector_id
 
     @classmethod
-    def batch_store_embeddings(cls, collection_name: str, keyword_embeddings: List[Dict[str, Any]]) -> List[str]:
-        if cls._index is None:
-            raise ValueError("Pinecone index not initialized. Call initialize() first.")
-
+    async def batch_store_embeddings(cls, collection_name: str, keyword_embeddings: List[Dict[str, Any]],
+                                     timeout: Optional[float] = None) -> Optional[WriteTicket]:
+        """Store vectors, returns the write-behind ticket of buffered ones (None when written directly)."""
         vectors = [{
-            "id": str(uuid.uuid4()),
-            "values": item["embedding"][0],
+            "id": item.get("id") or str(uuid.uuid4()),
+            "values": item["embedding"],
             "metadata": item.get("metadata", {})
         } for item in keyword_embeddings]
-        cls._index.upsert(vectors)
-        return True
+        if cls._write_buffer is not None:
+            # Returns once buffered, the vectors become searchable when their batch is written.
+            # Callers that need them durable pass the ticket to flush(), which raises if they failed.
+            return await cls._write_buffer.put(vectors, namespace=collection_name)
+        await cls._run(lambda: cls._store.upsert(vectors, namespace=collection_name), timeout=timeout)
+        return None
 
     @classmethod
-    def find_similar(cls, query_embedding: List[float], limit: int = 5, min_score: float = 0.7) -> List[Dict[str, Any]]:
-        if cls._index is None:
-            raise ValueError("Pinecone index not initialized. Call initialize() first.")
+    async def list_ids(cls, prefix: str, collection_name: str = DEFAULT_COLLECTION,
+                       timeout: Optional[float] = None) -> List[str]:
+        ids = await cls._run(lambda: cls._store.list_ids(prefix, namespace=collection_name), timeout=timeout)
+        if cls._write_buffer is not None:
+            ids = list(dict.fromkeys([*ids, *cls._write_buffer.pending_ids(collection_name, prefix)]))
+        return ids
+
+    @classmethod
+    async def delete(cls, ids: List[str], collection_name: str = DEFAULT_COLLECTION, timeout: Optional[float] = None):
+        if not ids:
+            return
+        if cls._write_buffer is not None:
+            cls._write_buffer.discard(collection_name, ids)
+            # A batch already being written could land after the delete
+            if set(ids) & set(cls._write_buffer.pending_ids(collection_name)):
+                # Earlier write failures belong to whoever flushes for them, not to this delete
+                await cls._write_buffer.flush(raise_errors=False)
+        ids = list(ids)
+        await cls._run(lambda: cls._store.delete(ids, namespace=collection_name), timeout=timeout)
+
+    @classmethod
+    async def delete_collection(cls, collection_name: str, timeout: Optional[float] = None):
+        if cls._write_buffer is not None:
+            cls._write_buffer.discard(collection_name)
+            if cls._write_buffer.pending_ids(collection_name):
+                await cls._write_buffer.flush(raise_errors=False)
+        await cls._run(lambda: cls._store.delete_namespace(collection_name), timeout=timeout)
+
+    @classmethod
+    async def get_collection_stats(cls, timeout: Optional[float] = None) -> Dict[str, int]:
+        """Vector count per collection."""
+        return await cls._run(lambda: cls._store.describe_namespaces(), timeout=timeout)
+
+    @classmethod
+    async def flush(cls, tickets: Optional[Iterable[Optional[WriteTicket]]] = None):
+        """Wait until buffered vectors have been written to the index.
+
+        With ``tickets`` only the vectors of those ``batch_store_embeddings`` calls
+        are waited for, without cutting batches early. Raises ``VectorDatabaseError``
+        if vectors it waited for failed to write.
+        """
+        if cls._write_buffer is not None:
+            if tickets is not None:
+                tickets = [ticket for ticket in tickets if ticket is not None]
+            await cls._write_buffer.flush(tickets)
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        return {
+            "vectors": len(cls._store) if isinstance(cls._store, NumpyVectorStore) else None,
+            "write_buffer": cls._write_buffer.get_stats() if cls._write_buffer is not None else None,
+        }
+
+    @classmethod
+    async def find_similar(cls, query_embedding: List[float], limit: int = 5, min_score: float = 0.7,
+                           filter: Optional[Dict[str, Any]] = None, collection_name: str = DEFAULT_COLLECTION,
+                           timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        results = await cls._run(
+            lambda: cls._store.query(query_embedding, top_k=limit, filter=filter, namespace=collection_name),
+            timeout=timeout,
+        )
+        return [result for result in results if result['score'] >= min_score]
+
+    @classmethod
+    async def find_similar_many(cls, query_embeddings: Sequence[List[float]], limit: int = 5,
+                                min_score: Union[float, Sequence[float]] = 0.7,
+                                filter: Union[None, Dict[str, Any], Sequence[Optional[Dict[str, Any]]]] = None,
+                                collection_name: str = DEFAULT_COLLECTION,
+                                timeout: Optional[float] = None) -> List[List[Dict[str, Any]]]:
+        """Run several queries concurrently and return the matches grouped per query.
+
+        ``min_score`` and ``filter`` apply to every query, or take one value per query.
+        """
+        min_scores = [min_score] * len(query_embeddings) if isinstance(min_score, (int, float)) else list(min_score)
+        filters = list(filter) if isinstance(filter, (list, tuple)) else [filter] * len(query_embeddings)
+        if len(min_scores) != len(query_embeddings) or len(filters) != len(query_embeddings):
+            raise ValueError("min_score and filter lists must have one entry per query embedding")
 
-        results = cls._index.query(query_embedding, top_k=limit, include_metadata=True)
-        return [result for result in results.matches if result['score'] >= min_score]
+        return list(await asyncio.gather(*(
+            cls.find_similar(query_embedding, limit=limit, min_score=query_min_score, filter=query_filter,
+                             collection_name=collection_name, timeout=timeout)
+            for query_embedding, query_min_score, query_filter in zip(query_embeddings, min_scores, filters)
+        )))
 
     @classmethod
-    def cleanup(cls):
-        cls._index = None
\ No newline at end of file
+    async def cleanup(cls):
+        if cls._write_buffer is not None:
+            try:
+                await cls._write_buffer.close()
+            except Exception as e:
+                logger.error(f"Failed to write buffered vectors on shutdown: {str(e)}")
+            cls._write_buffer = None
+        store = cls._store
+        if isinstance(store, NumpyVectorStore) and cls._snapshot_path and not store.read_only:
+            try:
+                written = store.export_snapshot(cls._snapshot_path)
+                logger.info(f"Wrote {written} vector records to snapshot {cls._snapshot_path}")
+            except Exception as e:
+                logger.error(f"Failed to write vector snapshot: {str(e)}")
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False)
+            cls._executor = None
+        if cls._store is not None:
+            cls._store.close()
+            cls._store = None
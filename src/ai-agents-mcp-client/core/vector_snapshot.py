@@ -0,0 +1,170 @@
+"""On-disk snapshot of a NumpyVectorStore that workers can memory-map.
+
+A snapshot is a directory holding:
+
+- ``vectors.bin``: row-major vector block in the store's dtype (float32, float16 or int8), one row per record
+- ``scales.f32``: float32 per-row scale of int8 vectors, absent for other dtypes
+- ``ids.bin``: packed ID table, a little-endian uint16 length then UTF-8 bytes per record
+- ``metadata.jsonl``: one JSON line per record, ``null`` marks a deleted ID
+- ``header.json``: dimension, dtype, record count and the valid byte length of every file
+
+Records are only ever appended. When an ID appears several times the last record
+wins, so updates and deletions are appends too. The header is replaced
+atomically after the data files are flushed, so readers always see a
+consistent prefix and a crashed append is truncated away by the next one.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import fcntl
+import json
+import os
+import shutil
+import struct
+from contextlib import contextmanager
+
+import numpy as np
+
+HEADER_FILE = "header.json"
+VECTORS_FILE = "vectors.bin"
+SCALES_FILE = "scales.f32"
+IDS_FILE = "ids.bin"
+METADATA_FILE = "metadata.jsonl"
+LOCK_FILE = ".lock"
+# Header last, a snapshot whose header is in place has all of its data files
+SNAPSHOT_FILES = (VECTORS_FILE, SCALES_FILE, IDS_FILE, METADATA_FILE, HEADER_FILE)
+SNAPSHOT_VERSION = 1
+
+# (id, stored vector or None, int8 scale, metadata or None), a None metadata marks a deletion
+SnapshotRecord = Tuple[str, Optional[np.ndarray], float, Optional[Dict[str, Any]]]
+
+def read_header(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(path, HEADER_FILE)) as header_file:
+            return json.load(header_file)
+    except FileNotFoundError:
+        return None
+
+def _write_header(path: str, header: Dict[str, Any]):
+    tmp_path = os.path.join(path, HEADER_FILE + ".tmp")
+    with open(tmp_path, "w") as header_file:
+        json.dump(header, header_file)
+        header_file.flush()
+        os.fsync(header_file.fileno())
+    os.replace(tmp_path, os.path.join(path, HEADER_FILE))
+
+@contextmanager
+def snapshot_lock(path: str):
+    """Exclusive lock so several workers never write the same snapshot at once."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)) or ".", exist_ok=True)
+    with open(os.path.abspath(path) + LOCK_FILE, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _encode_records(records: Iterable[SnapshotRecord], dimension: int, dtype: str) -> Tuple[bytearray, bytearray, bytearray, bytearray, int]:
+    vectors, scales, ids, metadata = bytearray(), bytearray(), bytearray(), bytearray()
+    count = 0
+    zero_row = np.zeros(dimension, dtype=dtype)
+    for vector_id, vector, scale, record_metadata in records:
+        row = zero_row if vector is None else np.asarray(vector, dtype=dtype)
+        vectors += row.tobytes()
+        if dtype == "int8":
+            scales += struct.pack("<f", scale)
+        encoded_id = vector_id.encode("utf-8")
+        ids += struct.pack("<H", len(encoded_id)) + encoded_id
+        metadata += (json.dumps(record_metadata, separators=(",", ":")) + "\n").encode("utf-8")
+        count += 1
+    return vectors, scales, ids, metadata, count
+
+def _append_files(path: str, header: Dict[str, Any], vectors: bytes, scales: bytes, ids: bytes, metadata: bytes):
+    files = [(VECTORS_FILE, "vectors_bytes", vectors), (IDS_FILE, "ids_bytes", ids), (METADATA_FILE, "metadata_bytes", metadata)]
+    if header["dtype"] == "int8":
+        files.append((SCALES_FILE, "scales_bytes", scales))
+    for file_name, length_key, data in files:
+        with open(os.path.join(path, file_name), "r+b" if os.path.exists(os.path.join(path, file_name)) else "w+b") as data_file:
+            # Drop whatever a crashed append left past the committed length
+            data_file.truncate(header[length_key])
+            data_file.seek(header[length_key])
+            data_file.write(data)
+            data_file.flush()
+            os.fsync(data_file.fileno())
+        header[length_key] += len(data)
+
+def write_snapshot(path: str, dimension: int, dtype: str, records: Iterable[SnapshotRecord]):
+    """Write a full snapshot next to ``path`` and swap it in.
+
+    Workers that already memory-mapped the old files keep reading them until
+    they reopen the snapshot.
+    """
+    path = os.path.abspath(path)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "dimension": dimension,
+        "dtype": dtype,
+        "records": 0,
+        "vectors_bytes": 0,
+        "scales_bytes": 0,
+        "ids_bytes": 0,
+        "metadata_bytes": 0,
+    }
+    vectors, scales, ids, metadata, count = _encode_records(records, dimension, dtype)
+    _append_files(tmp_path, header, vectors, scales, ids, metadata)
+    header["records"] = count
+    _write_header(tmp_path, header)
+
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def append_snapshot(path: str, dimension: int, dtype: str, records: Iterable[SnapshotRecord]) -> int:
+    """Append records to an existing snapshot without rewriting it."""
+    header = read_header(path)
+    if header is None or header["dimension"] != dimension or header["dtype"] != dtype:
+        raise ValueError(f"No {dtype} snapshot of dimension {dimension} at {path}")
+
+    vectors, scales, ids, metadata, count = _encode_records(records, dimension, dtype)
+    if count:
+        _append_files(path, header, vectors, scales, ids, metadata)
+        header["records"] += count
+        _write_header(path, header)
+    return count
+
+def read_snapshot(path: str) -> Tuple[Dict[str, Any], np.memmap, Optional[np.ndarray], List[str], List[Optional[Dict[str, Any]]]]:
+    """Open a snapshot, the vector block is returned as a read-only memory map.
+
+    The per-row scales are only returned for int8 snapshots.
+    """
+    header = read_header(path)
+    if header is None:
+        raise FileNotFoundError(f"No vector snapshot at {path}")
+
+    records, dimension, dtype = header["records"], header["dimension"], header["dtype"]
+    if records:
+        vectors = np.memmap(os.path.join(path, VECTORS_FILE), dtype=dtype, mode="r", shape=(records, dimension))
+    else:
+        vectors = np.zeros((0, dimension), dtype=dtype)
+
+    scales = None
+    if dtype == "int8":
+        scales = np.fromfile(os.path.join(path, SCALES_FILE), dtype="<f4", count=records) if records else np.zeros(0, dtype=np.float32)
+
+    with open(os.path.join(path, IDS_FILE), "rb") as ids_file:
+        packed_ids = ids_file.read(header["ids_bytes"])
+    ids, offset = [], 0
+    while offset < len(packed_ids):
+        (length,) = struct.unpack_from("<H", packed_ids, offset)
+        offset += 2
+        ids.append(packed_ids[offset:offset + length].decode("utf-8"))
+        offset += length
+
+    with open(os.path.join(path, METADATA_FILE), "rb") as metadata_file:
+        metadata = [json.loads(line) for line in metadata_file.read(header["metadata_bytes"]).splitlines()]
+
+    return header, vectors, scales, ids, metadata
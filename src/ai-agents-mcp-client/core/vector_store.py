@@ -0,0 +1,581 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+import logging
+import os
+import shutil
+import threading
+
+import numpy as np
+from pinecone.grpc import PineconeGRPC, GRPCClientConfig
+
+from core.vector_snapshot import (
+    SNAPSHOT_FILES, append_snapshot, read_header, read_snapshot, snapshot_lock, write_snapshot,
+)
+from exceptions.service_exceptions import VectorDatabaseError
+
+logger = logging.getLogger(__name__)
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+# Rows upcast to float32 per block when scoring quantized storage, small enough to stay in cache
+_SCORE_BLOCK_ROWS = 1024
+
+class VectorStore(ABC):
+    """Blocking vector index backend used by VectorDatabase.
+
+    Vectors are dicts with ``id``, ``values`` and ``metadata``, matches are dicts
+    with ``id``, ``score`` and ``metadata``. Every call is scoped to one namespace,
+    "" being the default one, and queries only scan their namespace.
+    """
+
+    @abstractmethod
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = ""):
+        pass
+
+    @abstractmethod
+    def query(self, vector: List[float], top_k: int, filter: Optional[Dict[str, Any]] = None,
+              namespace: str = "") -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def delete(self, ids: List[str], namespace: str = ""):
+        pass
+
+    @abstractmethod
+    def list_ids(self, prefix: str, namespace: str = "") -> List[str]:
+        pass
+
+    @abstractmethod
+    def delete_namespace(self, namespace: str):
+        pass
+
+    @abstractmethod
+    def describe_namespaces(self) -> Dict[str, int]:
+        """Vector count per namespace."""
+
+    def close(self):
+        pass
+
+class PineconeVectorStore(VectorStore):
+    def __init__(self, api_key: str, host: str, index_name: str, dimension: int):
+        pinecone_client = PineconeGRPC(api_key=api_key, host=host)
+
+        index_spec = {
+            "serverless": {
+                "cloud": "aws",
+                "region": "us-east-1"
+            }
+        }
+        indexes = pinecone_client.list_indexes()
+
+        if not any(idx.get("name") == index_name for idx in indexes):
+            pinecone_client.create_index(index_name, dimension=dimension, metric="cosine", spec=index_spec)
+        else:
+            logger.info(f"Index '{index_name}' already exists. Skipping creation.")
+
+        self._index = pinecone_client.Index(index_name, grpc_config=GRPCClientConfig(secure=False))
+        # An existing index keeps the width it was created with
+        self.dimension = self._index.describe_index_stats()["dimension"]
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = ""):
+        self._index.upsert(vectors, namespace=namespace)
+
+    def query(self, vector: List[float], top_k: int, filter: Optional[Dict[str, Any]] = None,
+              namespace: str = "") -> List[Dict[str, Any]]:
+        results = self._index.query(vector=vector, top_k=top_k, filter=filter, namespace=namespace, include_metadata=True)
+        return [
+            {"id": match["id"], "score": match["score"], "metadata": match["metadata"] or {}}
+            for match in results.matches
+        ]
+
+    def delete(self, ids: List[str], namespace: str = ""):
+        if ids:
+            self._index.delete(ids=ids, namespace=namespace)
+
+    def list_ids(self, prefix: str, namespace: str = "") -> List[str]:
+        # Pages through every ID starting with the prefix
+        return [vector_id for page in self._index.list(prefix=prefix, namespace=namespace) for vector_id in page]
+
+    def delete_namespace(self, namespace: str):
+        self._index.delete(delete_all=True, namespace=namespace)
+
+    def describe_namespaces(self) -> Dict[str, int]:
+        stats = self._index.describe_index_stats()
+        return {name: summary["vector_count"] for name, summary in (stats["namespaces"] or {}).items()}
+
+class NumpyIndex:
+    """In-process cosine index over one contiguous matrix.
+
+    Rows are stored L2-normalised so a query is a single matrix-vector product
+    followed by a partial sort. Metadata fields are dictionary-encoded into int32
+    column arrays so filters are evaluated as boolean masks over all rows at once.
+
+    Rows can be kept as float16, or as int8 with one float32 scale per row, to
+    cut memory by 2x or 4x at a small cost in recall.
+    """
+
+    def __init__(self, dimension: int, initial_capacity: int = 1024, dtype: str = "float32"):
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unsupported vector storage dtype: {dtype}")
+        self.dimension = dimension
+        self.dtype = dtype
+        # Appends rewrite the snapshot instead once this share of its records is superseded or deleted
+        self.compact_ratio = float(os.getenv("VECTOR_DB_SNAPSHOT_COMPACT_RATIO", 0.5))
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((initial_capacity, dimension), dtype=dtype)
+        self._scales = np.ones(initial_capacity, dtype=np.float32) if dtype == "int8" else None
+        self._live = np.zeros(initial_capacity, dtype=bool)
+        self._ids: List[Optional[str]] = [None] * initial_capacity
+        self._metadata: List[Optional[Dict[str, Any]]] = [None] * initial_capacity
+        # field -> int32 code per row (-1 when missing), field -> {value: code}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._codes: Dict[str, Dict[Any, int]] = {}
+        self._rows: Dict[str, int] = {}
+        self._size = 0
+        self.read_only = False
+        # Changes since the last snapshot export, appended on the next one
+        self._snapshot_path: Optional[str] = None
+        self._dirty: set = set()
+        self._deleted: set = set()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def capacity(self) -> int:
+        return self._matrix.shape[0]
+
+    def _grow(self, required: int):
+        capacity = max(self.capacity, 1)
+        while capacity < required:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+
+        extra = capacity - self.capacity
+        self._matrix = np.vstack([self._matrix, np.zeros((extra, self.dimension), dtype=self.dtype)])
+        if self._scales is not None:
+            self._scales = np.concatenate([self._scales, np.ones(extra, dtype=np.float32)])
+        self._live = np.concatenate([self._live, np.zeros(extra, dtype=bool)])
+        self._ids.extend([None] * extra)
+        self._metadata.extend([None] * extra)
+        for field, column in self._columns.items():
+            self._columns[field] = np.concatenate([column, np.full(extra, -1, dtype=np.int32)])
+
+    @staticmethod
+    def _hashable(value: Any) -> Any:
+        return tuple(value) if isinstance(value, list) else value
+
+    def _encode(self, field: str, value: Any) -> int:
+        codes = self._codes.setdefault(field, {})
+        key = self._hashable(value)
+        if key not in codes:
+            codes[key] = len(codes)
+        return codes[key]
+
+    def _set_metadata(self, row: int, metadata: Dict[str, Any]):
+        previous = self._metadata[row] or {}
+        for field in previous.keys() - metadata.keys():
+            self._columns[field][row] = -1
+        for field, value in metadata.items():
+            if field not in self._columns:
+                self._columns[field] = np.full(self.capacity, -1, dtype=np.int32)
+            self._columns[field][row] = self._encode(field, value)
+        self._metadata[row] = metadata
+
+    def _quantize(self, values: np.ndarray):
+        """Convert normalised float32 rows to the storage dtype, returns (rows, scales)."""
+        if self.dtype == "int8":
+            scales = np.abs(values).max(axis=1) / 127
+            scales[scales == 0] = 1
+            return np.rint(values / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        return values.astype(self.dtype, copy=False), None
+
+    def _scores(self, rows: np.ndarray, scales: Optional[np.ndarray], query: np.ndarray) -> np.ndarray:
+        if self.dtype == "float32":
+            return rows @ query
+        # Upcast block by block so a query never materialises a float32 copy of the whole matrix
+        scores = np.empty(len(rows), dtype=np.float32)
+        buffer = np.empty((min(len(rows), _SCORE_BLOCK_ROWS), self.dimension), dtype=np.float32)
+        for start in range(0, len(rows), _SCORE_BLOCK_ROWS):
+            block = rows[start:start + _SCORE_BLOCK_ROWS]
+            np.copyto(buffer[:len(block)], block, casting="unsafe")
+            scores[start:start + len(block)] = buffer[:len(block)] @ query
+        if scales is not None:
+            scores *= scales
+        return scores
+
+    def _check_writable(self):
+        if self.read_only:
+            raise VectorDatabaseError("Vector store is opened read-only from a snapshot", "VECTOR_DB_READ_ONLY")
+
+    def upsert(self, vectors: List[Dict[str, Any]]):
+        self._check_writable()
+        if not vectors:
+            return
+
+        values = np.asarray([vector["values"] for vector in vectors], dtype=np.float32)
+        if values.ndim != 2 or values.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of dimension {self.dimension}, got {values.shape}")
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values, scales = self._quantize(values / np.where(norms == 0, 1, norms))
+
+        with self._lock:
+            new_ids = {vector["id"] for vector in vectors if vector["id"] not in self._rows}
+            self._grow(self._size + len(new_ids))
+            for index, (vector, row_values) in enumerate(zip(vectors, values)):
+                row = self._rows.get(vector["id"])
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._rows[vector["id"]] = row
+                    self._ids[row] = vector["id"]
+                self._matrix[row] = row_values
+                if scales is not None:
+                    self._scales[row] = scales[index]
+                self._live[row] = True
+                self._set_metadata(row, vector.get("metadata") or {})
+                self._dirty.add(vector["id"])
+                self._deleted.discard(vector["id"])
+
+    def delete(self, ids: List[str]):
+        self._check_writable()
+        with self._lock:
+            for vector_id in ids:
+                row = self._rows.pop(vector_id, None)
+                if row is None:
+                    continue
+                self._dirty.discard(vector_id)
+                self._deleted.add(vector_id)
+                self._live[row] = False
+                self._set_metadata(row, {})
+                self._metadata[row] = None
+                self._ids[row] = None
+            # Reclaim space once most of the rows are dead
+            if self._size > 1024 and len(self._rows) < self._size // 2:
+                self._compact()
+
+    def list_ids(self, prefix: str) -> List[str]:
+        with self._lock:
+            return [vector_id for vector_id in self._rows if vector_id.startswith(prefix)]
+
+    def _compact(self):
+        rows = np.flatnonzero(self._live[:self._size])
+        capacity = max(1024, self.capacity // 2, len(rows))
+        self._matrix = np.ascontiguousarray(np.vstack([
+            self._matrix[rows],
+            np.zeros((capacity - len(rows), self.dimension), dtype=self.dtype),
+        ]))
+        if self._scales is not None:
+            self._scales = np.concatenate([self._scales[rows], np.ones(capacity - len(rows), dtype=np.float32)])
+        self._live = np.zeros(capacity, dtype=bool)
+        self._live[:len(rows)] = True
+        self._ids = [self._ids[row] for row in rows] + [None] * (capacity - len(rows))
+        self._metadata = [self._metadata[row] for row in rows] + [None] * (capacity - len(rows))
+        for field, column in self._columns.items():
+            self._columns[field] = np.concatenate([column[rows], np.full(capacity - len(rows), -1, dtype=np.int32)])
+        self._rows = {vector_id: row for row, vector_id in enumerate(self._ids[:len(rows)])}
+        self._size = len(rows)
+
+    @classmethod
+    def from_snapshot(cls, path: str, read_only: bool = True) -> "NumpyIndex":
+        """Open a snapshot written by ``export_snapshot``.
+
+        Read-only stores query the memory-mapped vector block directly, so every
+        worker opening the same snapshot shares one page-cached copy. Writable
+        stores copy the live rows into memory.
+        """
+        header, vectors, scales, ids, metadata = read_snapshot(path)
+        latest = {vector_id: record for record, vector_id in enumerate(ids)}
+        store = cls(dimension=header["dimension"], initial_capacity=1, dtype=header["dtype"])
+
+        if read_only:
+            # Keep every record in place and hide the superseded or deleted ones
+            row_ids = [None] * len(ids)
+            for vector_id, record in latest.items():
+                if metadata[record] is not None:
+                    row_ids[record] = vector_id
+            store._load(vectors, scales, row_ids, [metadata[record] if row_ids[record] else None for record in range(len(ids))])
+            store.read_only = True
+        else:
+            records = sorted(record for record in latest.values() if metadata[record] is not None)
+            store._load(
+                np.array(vectors[records]),
+                scales[records] if scales is not None else None,
+                [ids[record] for record in records],
+                [metadata[record] for record in records],
+            )
+
+        store._snapshot_path = path
+        logger.info(f"Opened vector snapshot {path} with {len(store)} vectors ({'read-only' if read_only else 'writable'})")
+        return store
+
+    def _load(self, matrix: np.ndarray, scales: Optional[np.ndarray], row_ids: List[Optional[str]],
+              row_metadata: List[Optional[Dict[str, Any]]]):
+        self._matrix = matrix
+        self._scales = scales
+        self._size = len(row_ids)
+        self._live = np.asarray([vector_id is not None for vector_id in row_ids], dtype=bool)
+        self._ids = list(row_ids)
+        self._metadata = [None] * self._size
+        self._columns = {}
+        self._codes = {}
+        self._rows = {vector_id: row for row, vector_id in enumerate(row_ids) if vector_id is not None}
+        for row, metadata in enumerate(row_metadata):
+            if metadata is not None:
+                self._set_metadata(row, metadata)
+
+    def export_snapshot(self, path: str, full: bool = False) -> int:
+        """Write the store to ``path``.
+
+        When the store was loaded from or last exported to ``path``, only the
+        vectors changed since then are appended, unless that would leave more than
+        ``compact_ratio`` of the snapshot's records dead. Otherwise, or with ``full``,
+        only the live vectors are rewritten. Returns the number of records written.
+        """
+        with self._lock, snapshot_lock(path):
+            header = read_header(path)
+            compatible = header and header["dimension"] == self.dimension and header["dtype"] == self.dtype
+            if compatible and not full:
+                records = header["records"] + len(self._dirty) + len(self._deleted)
+                full = records > 0 and 1 - len(self._rows) / records > self.compact_ratio
+            if not full and path == self._snapshot_path and compatible:
+                dirty_rows = [(vector_id, self._rows[vector_id]) for vector_id in self._dirty]
+                records = [
+                    (vector_id, self._matrix[row], self._scale(row), self._metadata[row]) for vector_id, row in dirty_rows
+                ] + [(vector_id, None, 1.0, None) for vector_id in self._deleted]
+                written = append_snapshot(path, self.dimension, self.dtype, records)
+            else:
+                rows = np.flatnonzero(self._live[:self._size])
+                write_snapshot(path, self.dimension, self.dtype, (
+                    (self._ids[row], self._matrix[row], self._scale(row), self._metadata[row]) for row in rows
+                ))
+                written = len(rows)
+
+            self._snapshot_path = path
+            self._dirty.clear()
+            self._deleted.clear()
+            return written
+
+    def _scale(self, row: int) -> float:
+        return float(self._scales[row]) if self._scales is not None else 1.0
+
+    def _column(self, field: str, size: int) -> np.ndarray:
+        column = self._columns.get(field)
+        return column[:size] if column is not None else np.full(size, -1, dtype=np.int32)
+
+    def _lookup_codes(self, field: str, values: List[Any]) -> np.ndarray:
+        # Values never stored get no code, so they can't match any row
+        codes = self._codes.get(field, {})
+        return np.asarray([codes[key] for key in map(self._hashable, values) if key in codes], dtype=np.int32)
+
+    def _filter_mask(self, filter: Dict[str, Any], size: int) -> np.ndarray:
+        """Evaluate a Pinecone-style metadata filter ($eq, $ne, $in, $nin, $exists, $and, $or)."""
+        mask = np.ones(size, dtype=bool)
+        for field, condition in filter.items():
+            if field == "$and":
+                for sub_filter in condition:
+                    mask &= self._filter_mask(sub_filter, size)
+                continue
+            if field == "$or":
+                any_mask = np.zeros(size, dtype=bool)
+                for sub_filter in condition:
+                    any_mask |= self._filter_mask(sub_filter, size)
+                mask &= any_mask
+                continue
+
+            column = self._column(field, size)
+            operators = condition if isinstance(condition, dict) else {"$eq": condition}
+            for operator, operand in operators.items():
+                if operator == "$eq":
+                    mask &= np.isin(column, self._lookup_codes(field, [operand]))
+                elif operator == "$ne":
+                    mask &= ~np.isin(column, self._lookup_codes(field, [operand]))
+                elif operator == "$in":
+                    mask &= np.isin(column, self._lookup_codes(field, list(operand)))
+                elif operator == "$nin":
+                    mask &= ~np.isin(column, self._lookup_codes(field, list(operand)))
+                elif operator == "$exists":
+                    exists = column >= 0
+                    mask &= exists if operand else ~exists
+                else:
+                    raise ValueError(f"Unsupported metadata filter operator: {operator}")
+        return mask
+
+    def query(self, vector: List[float], top_k: int, filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        with self._lock:
+            size = self._size
+            if size == 0 or top_k <= 0:
+                return []
+
+            mask = self._live[:size]
+            if filter:
+                mask = mask & self._filter_mask(filter, size)
+            candidates = np.flatnonzero(mask)
+            if len(candidates) == 0:
+                return []
+
+            k = min(top_k, len(candidates))
+            if len(candidates) * 4 < size:
+                # Selective filter: gathering the few candidate rows is cheaper than scoring everything
+                scores = self._scores(
+                    self._matrix[candidates],
+                    self._scales[candidates] if self._scales is not None else None,
+                    query,
+                )
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                rows, top_scores = candidates[top], scores[top]
+            else:
+                scores = self._scores(self._matrix[:size], self._scales[:size] if self._scales is not None else None, query)
+                scores[~mask] = -np.inf
+                rows = np.argpartition(-scores, k - 1)[:k]
+                rows = rows[np.argsort(-scores[rows])]
+                top_scores = scores[rows]
+
+            return [
+                {"id": self._ids[row], "score": float(score), "metadata": self._metadata[row]}
+                for row, score in zip(rows, top_scores)
+            ]
+
+
+class NumpyVectorStore(VectorStore):
+    """In-process store keeping one NumpyIndex per namespace.
+
+    Namespaces are separate matrices, so a query only scans the vectors of its own
+    namespace. Snapshots hold one sub-directory per namespace.
+    """
+
+    def __init__(self, dimension: int, initial_capacity: int = 1024, dtype: str = "float32"):
+        self.dimension = dimension
+        self.initial_capacity = initial_capacity
+        self.dtype = dtype
+        self.read_only = False
+        self._indexes: Dict[str, NumpyIndex] = {}
+        self._deleted_namespaces: set = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._indexes.values())
+
+    def _check_writable(self):
+        if self.read_only:
+            raise VectorDatabaseError("Vector store is opened read-only from a snapshot", "VECTOR_DB_READ_ONLY")
+
+    def _index(self, namespace: str, create: bool = False) -> Optional[NumpyIndex]:
+        index = self._indexes.get(namespace)
+        if index is None and create:
+            self._check_writable()
+            with self._lock:
+                index = self._indexes.get(namespace)
+                if index is None:
+                    index = NumpyIndex(self.dimension, initial_capacity=self.initial_capacity, dtype=self.dtype)
+                    self._indexes[namespace] = index
+                self._deleted_namespaces.discard(namespace)
+        return index
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = ""):
+        if vectors:
+            self._index(namespace, create=True).upsert(vectors)
+
+    def query(self, vector: List[float], top_k: int, filter: Optional[Dict[str, Any]] = None,
+              namespace: str = "") -> List[Dict[str, Any]]:
+        index = self._index(namespace)
+        return index.query(vector, top_k, filter) if index is not None else []
+
+    def delete(self, ids: List[str], namespace: str = ""):
+        index = self._index(namespace)
+        if index is not None:
+            index.delete(ids)
+
+    def list_ids(self, prefix: str, namespace: str = "") -> List[str]:
+        index = self._index(namespace)
+        return index.list_ids(prefix) if index is not None else []
+
+    def delete_namespace(self, namespace: str):
+        self._check_writable()
+        with self._lock:
+            if self._indexes.pop(namespace, None) is not None:
+                self._deleted_namespaces.add(namespace)
+
+    def describe_namespaces(self) -> Dict[str, int]:
+        return {namespace: len(index) for namespace, index in self._indexes.items()}
+
+    @staticmethod
+    def _namespace_path(path: str, namespace: str) -> str:
+        # Hex keeps any namespace name a valid directory name without dots
+        return os.path.join(path, "ns-" + namespace.encode("utf-8").hex())
+
+    @staticmethod
+    def _flat_snapshot_files(path: str) -> List[str]:
+        # Snapshots written before namespaces existed hold their files directly in the snapshot directory
+        return [name for name in SNAPSHOT_FILES if os.path.exists(os.path.join(path, name))]
+
+    @classmethod
+    def migrate_flat_snapshot(cls, path: str, namespace: str) -> bool:
+        """Move a snapshot of the single-matrix store into ``namespace``. Returns whether there was one."""
+        namespace_path = cls._namespace_path(path, namespace)
+        with snapshot_lock(namespace_path):
+            flat_files = cls._flat_snapshot_files(path)
+            if not flat_files:
+                return False
+            # A header in both places means two snapshots, not an interrupted migration
+            if read_header(namespace_path) is not None:
+                raise VectorDatabaseError(
+                    f"Vector snapshot {path} holds both a flat snapshot and namespace '{namespace}'",
+                    "VECTOR_DB_SNAPSHOT_CONFLICT",
+                )
+            os.makedirs(namespace_path, exist_ok=True)
+            for name in flat_files:
+                os.replace(os.path.join(path, name), os.path.join(namespace_path, name))
+        logger.info(f"Moved flat vector snapshot {path} into namespace '{namespace}'")
+        return True
+
+    @classmethod
+    def _snapshot_namespaces(cls, path: str) -> Dict[str, str]:
+        if not os.path.isdir(path):
+            return {}
+        if cls._flat_snapshot_files(path):
+            raise VectorDatabaseError(
+                f"Vector snapshot {path} uses the flat layout, move it into a namespace with migrate_flat_snapshot()",
+                "VECTOR_DB_SNAPSHOT_LAYOUT",
+            )
+        return {
+            bytes.fromhex(entry[3:]).decode("utf-8"): os.path.join(path, entry)
+            for entry in sorted(os.listdir(path))
+            if entry.startswith("ns-") and "." not in entry and read_header(os.path.join(path, entry))
+        }
+
+    @classmethod
+    def snapshot_exists(cls, path: str) -> bool:
+        return bool(cls._snapshot_namespaces(path))
+
+    @classmethod
+    def from_snapshot(cls, path: str, read_only: bool = True) -> "NumpyVectorStore":
+        namespaces = cls._snapshot_namespaces(path)
+        if not namespaces:
+            raise FileNotFoundError(f"No vector snapshot at {path}")
+
+        indexes = {namespace: NumpyIndex.from_snapshot(namespace_path, read_only) for namespace, namespace_path in namespaces.items()}
+        first = next(iter(indexes.values()))
+        store = cls(dimension=first.dimension, dtype=first.dtype)
+        store._indexes = indexes
+        store.read_only = read_only
+        return store
+
+    def export_snapshot(self, path: str, full: bool = False) -> int:
+        """Export every namespace, see ``NumpyIndex.export_snapshot``. Returns the records written."""
+        os.makedirs(path, exist_ok=True)
+        written = 0
+        for namespace, index in list(self._indexes.items()):
+            written += index.export_snapshot(self._namespace_path(path, namespace), full=full)
+        for namespace in list(self._deleted_namespaces):
+            namespace_path = self._namespace_path(path, namespace)
+            with snapshot_lock(namespace_path):
+                shutil.rmtree(namespace_path, ignore_errors=True)
+            self._deleted_namespaces.discard(namespace)
+        return written
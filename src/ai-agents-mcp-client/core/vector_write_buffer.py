@@ -0,0 +1,283 @@
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+
+from exceptions.service_exceptions import VectorDatabaseError
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class FailedBatch:
+    # Order in which the batch was cut, a flush raises the failures of the batches it waited for
+    sequence: int
+    namespace: str
+    ids: List[str]
+    error: str
+
+class WriteTicket:
+    """The vectors of one ``put`` call, tells their caller whether they were written.
+
+    Failures are kept on the ticket, so only the caller holding it sees them and
+    no other flush can take them away.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.failed_ids: List[str] = []
+        self.error: Optional[str] = None
+        self._remaining = 0
+        self._buffering = True
+        self._done = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def _settle(self, count: int, failed_ids: Optional[List[str]] = None, error: Optional[str] = None):
+        self._remaining -= count
+        if failed_ids:
+            self.failed_ids.extend(failed_ids)
+            self.error = error
+        if not self._buffering and self._remaining == 0:
+            self._done.set()
+
+    async def wait(self):
+        await self._done.wait()
+
+class VectorWriteBuffer:
+    """Write-behind buffer that coalesces small upserts into large batches.
+
+    Vectors from every caller are appended to the pending batch of their namespace,
+    which is cut when it reaches ``max_batch_vectors`` vectors or ``max_batch_bytes``
+    estimated bytes, or ``flush_interval`` seconds after the first vector arrived.
+    Cut batches are written by ``streams`` concurrent workers. Once ``max_pending`` vectors are
+    buffered or being written, ``put`` waits, so producers slow down to the speed
+    of the index instead of growing the buffer without bound.
+
+    ``put`` returns a ``WriteTicket``. ``flush(tickets)`` waits for the batches
+    holding those vectors, without cutting batches early, and raises
+    ``VectorDatabaseError`` with the IDs of just those vectors that still failed
+    after their retries. ``flush()`` writes everything buffered and raises the
+    failures of the batches it waited for, while the tickets keep theirs.
+    """
+
+    def __init__(self, write: Callable[[List[Dict[str, Any]], str], Awaitable[Any]],
+                 max_batch_vectors: Optional[int] = None, max_batch_bytes: Optional[int] = None,
+                 flush_interval: Optional[float] = None, max_pending: Optional[int] = None,
+                 streams: Optional[int] = None, retries: int = 2):
+        self._write = write
+        self.max_batch_vectors = max_batch_vectors or int(os.getenv("VECTOR_DB_WRITE_BATCH_SIZE", 100))
+        # Pinecone rejects upsert requests above 2MB
+        self.max_batch_bytes = max_batch_bytes or int(os.getenv("VECTOR_DB_WRITE_BATCH_BYTES", 2 * 1024 * 1024))
+        self.flush_interval = flush_interval or float(os.getenv("VECTOR_DB_WRITE_FLUSH_INTERVAL", 0.5))
+        self.max_pending = max_pending or int(os.getenv("VECTOR_DB_WRITE_MAX_PENDING", 10000))
+        self.streams = streams or int(os.getenv("VECTOR_DB_WRITE_STREAMS", 4))
+        self.retries = retries
+
+        # namespace -> pending (vector, ticket) entries and their estimated size
+        self._pending: Dict[str, List[Tuple[Dict[str, Any], WriteTicket]]] = {}
+        self._pending_bytes: Dict[str, int] = {}
+        self._in_flight: Dict[int, Tuple[str, List[Tuple[Dict[str, Any], WriteTicket]]]] = {}
+        self._next_sequence = 0
+        # Failure lists of the flush() calls waiting right now
+        self._watchers: List[List[FailedBatch]] = []
+        self._buffered = 0
+        self._batches: Optional[asyncio.Queue] = None
+        self._not_full: Optional[asyncio.Condition] = None
+        self._has_pending: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self.batches_written = 0
+        self.vectors_written = 0
+        self.failed_vectors = 0
+        self.failed_batches = 0
+
+    def _start(self):
+        # Created on first use so the buffer binds to the running event loop
+        if self._tasks:
+            return
+        self._batches = asyncio.Queue()
+        self._not_full = asyncio.Condition()
+        self._has_pending = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._stream()) for _ in range(self.streams)]
+        self._tasks.append(asyncio.create_task(self._flush_timer()))
+
+    @staticmethod
+    def _estimate_bytes(vector: Dict[str, Any]) -> int:
+        metadata = json.dumps(vector.get("metadata") or {}, separators=(",", ":"), default=str)
+        return 4 * len(vector["values"]) + len(vector["id"]) + len(metadata)
+
+    async def put(self, vectors: Iterable[Dict[str, Any]], namespace: str = "") -> WriteTicket:
+        """Buffer vectors for writing, waits while the buffer is full."""
+        self._start()
+        ticket = WriteTicket(namespace)
+        try:
+            for vector in vectors:
+                size = self._estimate_bytes(vector)
+                async with self._not_full:
+                    await self._not_full.wait_for(lambda: self._buffered < self.max_pending)
+                    pending = self._pending.setdefault(namespace, [])
+                    pending.append((vector, ticket))
+                    ticket._remaining += 1
+                    self._pending_bytes[namespace] = self._pending_bytes.get(namespace, 0) + size
+                    self._buffered += 1
+                    self._has_pending.set()
+                    if len(pending) >= self.max_batch_vectors or self._pending_bytes[namespace] >= self.max_batch_bytes:
+                        self._cut_batch(namespace)
+        finally:
+            ticket._buffering = False
+            ticket._settle(0)
+        return ticket
+
+    def _cut_batch(self, namespace: str):
+        pending = self._pending.pop(namespace, None)
+        self._pending_bytes.pop(namespace, None)
+        if pending:
+            self._batches.put_nowait((self._next_sequence, namespace, pending))
+            self._next_sequence += 1
+        if not self._pending:
+            self._has_pending.clear()
+
+    def _cut_all(self):
+        for namespace in list(self._pending):
+            self._cut_batch(namespace)
+
+    async def _flush_timer(self):
+        while True:
+            await self._has_pending.wait()
+            # Give the batch a chance to fill before sending it
+            await asyncio.sleep(self.flush_interval)
+            self._cut_all()
+
+    async def _stream(self):
+        while True:
+            sequence, namespace, batch = await self._batches.get()
+            self._in_flight[id(batch)] = (namespace, batch)
+            error = None
+            try:
+                await self._write_with_retries([vector for vector, _ in batch], namespace)
+                self.batches_written += 1
+                self.vectors_written += len(batch)
+            except Exception as e:
+                error = str(e)
+                self.failed_vectors += len(batch)
+                self.failed_batches += 1
+                failure = FailedBatch(sequence, namespace, [vector["id"] for vector, _ in batch], error)
+                for watcher in self._watchers:
+                    watcher.append(failure)
+                logger.error(f"Failed to write {len(batch)} buffered vectors: {error}")
+            finally:
+                del self._in_flight[id(batch)]
+                self._settle_tickets(batch, error)
+                async with self._not_full:
+                    self._buffered -= len(batch)
+                    self._not_full.notify_all()
+                self._batches.task_done()
+
+    async def _write_with_retries(self, batch: List[Dict[str, Any]], namespace: str):
+        for attempt in range(self.retries + 1):
+            try:
+                return await self._write(batch, namespace)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = 0.5 * (2 ** attempt)
+                logger.warning(f"Vector batch write failed ({str(e)}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _settle_tickets(entries: List[Tuple[Dict[str, Any], WriteTicket]], error: Optional[str] = None):
+        failed_ids: Dict[int, Tuple[WriteTicket, List[str]]] = {}
+        for vector, ticket in entries:
+            failed_ids.setdefault(id(ticket), (ticket, []))[1].append(vector["id"])
+        for ticket, ids in failed_ids.values():
+            ticket._settle(len(ids), ids if error is not None else None, error)
+
+    def discard(self, namespace: str, ids: Optional[Iterable[str]] = None) -> int:
+        """Drop pending vectors with these IDs (all when None), so a delete isn't undone by a later flush."""
+        pending = self._pending.get(namespace, [])
+        ids = set(ids) if ids is not None else None
+        kept = [entry for entry in pending if ids is not None and entry[0]["id"] not in ids]
+        dropped = len(pending) - len(kept)
+        if dropped:
+            # Dropped on purpose, their tickets don't wait for them and don't count them as failed
+            self._settle_tickets([entry for entry in pending if ids is None or entry[0]["id"] in ids])
+            if kept:
+                self._pending[namespace] = kept
+                self._pending_bytes[namespace] = sum(self._estimate_bytes(vector) for vector, _ in kept)
+            else:
+                self._pending.pop(namespace, None)
+                self._pending_bytes.pop(namespace, None)
+                if not self._pending:
+                    self._has_pending.clear()
+            self._buffered -= dropped
+            asyncio.ensure_future(self._notify_not_full())
+        return dropped
+
+    async def _notify_not_full(self):
+        async with self._not_full:
+            self._not_full.notify_all()
+
+    def pending_ids(self, namespace: str, prefix: str = "") -> List[str]:
+        """IDs buffered or being written to a namespace, not yet visible in the index."""
+        batches = [self._pending.get(namespace, [])]
+        batches += [batch for batch_namespace, batch in self._in_flight.values() if batch_namespace == namespace]
+        return [vector["id"] for batch in batches for vector, _ in batch if vector["id"].startswith(prefix)]
+
+    async def flush(self, tickets: Optional[Iterable[WriteTicket]] = None, raise_errors: bool = True):
+        """Wait until vectors are written.
+
+        With ``tickets``, waits for the vectors of those tickets only, their batches
+        are still cut by size or by the flush interval, and raises for the ones that
+        failed. Without, cuts and writes everything buffered so far and raises for
+        the batches it waited for that failed. Tickets keep their failures either way.
+        """
+        if tickets is not None:
+            tickets = list(tickets)
+            await asyncio.gather(*(ticket.wait() for ticket in tickets))
+            failures = [FailedBatch(-1, ticket.namespace, ticket.failed_ids, ticket.error)
+                        for ticket in tickets if ticket.failed_ids]
+        else:
+            if not self._tasks:
+                return
+            self._cut_all()
+            covered = self._next_sequence
+            watcher: List[FailedBatch] = []
+            self._watchers.append(watcher)
+            try:
+                await self._batches.join()
+            finally:
+                self._watchers.remove(watcher)
+            failures = [failure for failure in watcher if failure.sequence < covered]
+        if failures and raise_errors:
+            failed_ids: Dict[str, List[str]] = {}
+            for failure in failures:
+                failed_ids.setdefault(failure.namespace, []).extend(failure.ids)
+            raise VectorDatabaseError(
+                f"{sum(len(failure.ids) for failure in failures)} buffered vectors failed to write: {failures[-1].error}",
+                "VECTOR_DB_WRITE_FAILED",
+                {"failed_ids": failed_ids},
+            )
+
+    async def close(self):
+        try:
+            await self.flush()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": self._buffered,
+            "pending": sum(len(pending) for pending in self._pending.values()),
+            "queued_batches": self._batches.qsize() if self._batches is not None else 0,
+            "batches_written": self.batches_written,
+            "vectors_written": self.vectors_written,
+            "failed_vectors": self.failed_vectors,
+            "failed_batches": self.failed_batches,
+        }
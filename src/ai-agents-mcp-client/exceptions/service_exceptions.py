@@ -29,4 +29,12 @@ class TimeoutError(ServiceError):
 
 class VectorDatabaseError(ServiceError):
     """Raised when vector database operations fail"""
-    pass
\ No newline at end of file
+    pass
+
+class NotFoundError(ServiceError):
+    """Raised when a requested resource does not exist"""
+    pass
+
+class CapacityError(ServiceError):
+    """Raised when a bounded queue cannot accept more work"""
+    pass
@@ -10,15 +10,18 @@ from dotenv import load_dotenv
 from colorama import Fore, Style
 from core.client_manager import ClientManager
 from core.vector_db import VectorDatabase
+from core.job_queue import JobManager
+from preprocess.preprocess_service import PreprocessService
 from products import router as product_module_router
 from products.product_performance_controller import router as performance_router
-from recommendations.recommendations_controller import router as recommendations_router
+from recommendations.recommendations_controller import router as recommendations_router, run_add_product_job
 from order_processing.order_processing_controller import router as order_processing_router
 
 # Import error handling
 from exceptions.service_exceptions import (
     ServiceError, AIServiceError, MCPConnectionError, 
-    ConfigurationError, ValidationError, TimeoutError, VectorDatabaseError
+    ConfigurationError, ValidationError, TimeoutError, VectorDatabaseError,
+    NotFoundError, CapacityError
 )
 from schemas.error_schemas import StandardErrorResponse, ErrorDetail, ErrorCode
 
@@ -122,6 +125,30 @@ async def vector_db_error_handler(request, exc: VectorDatabaseError):
         ).dict()
     )
 
+@app.exception_handler(NotFoundError)
+async def not_found_error_handler(request, exc: NotFoundError):
+    return JSONResponse(
+        status_code=404,
+        content=StandardErrorResponse(
+            error_code=exc.error_code or ErrorCode.NOT_FOUND,
+            message=str(exc),
+            details=exc.details,
+            request_id=str(uuid.uuid4())
+        ).dict()
+    )
+
+@app.exception_handler(CapacityError)
+async def capacity_error_handler(request, exc: CapacityError):
+    return JSONResponse(
+        status_code=503,
+        content=StandardErrorResponse(
+            error_code=exc.error_code or ErrorCode.CAPACITY_ERROR,
+            message=str(exc),
+            details=exc.details,
+            request_id=str(uuid.uuid4())
+        ).dict()
+    )
+
 @app.exception_handler(ServiceError)
 async def service_error_handler(request, exc: ServiceError):
     return JSONResponse(
@@ -150,11 +177,12 @@ async def general_error_handler(request, exc: Exception):
 @app.on_event("startup")
 async def startup_event():
     try:
+        server_url = os.getenv("MCP_SERVER_URL")
         server_script_path = os.getenv("MCP_SERVER_SCRIPT_PATH")
-        if not server_script_path:
-            raise ConfigurationError("MCP_SERVER_SCRIPT_PATH environment variable is not set", "MISSING_CONFIG")
+        if not server_url and not server_script_path:
+            raise ConfigurationError("Either MCP_SERVER_URL or MCP_SERVER_SCRIPT_PATH environment variable must be set", "MISSING_CONFIG")
         
-        await ClientManager.initialize(server_script_path)
+        await ClientManager.initialize(server_script_path=server_script_path, server_url=server_url)
         logger.info("MCP Client initialized successfully")
         
         # Initialize vector database with error handling
@@ -166,6 +194,9 @@ async def startup_event():
         except Exception as e:
             logger.warning(f"Vector database initialization failed: {str(e)}. Vector search functionality may be limited.")
             # Don't fail startup for vector DB issues, just log the warning
+
+        await JobManager.initialize({"add_product": run_add_product_job})
+        logger.info("Job queue started")
             
     except (ConfigurationError, MCPConnectionError) as e:
         logger.error(f"Startup failed: {str(e)}")
@@ -176,17 +207,34 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    # Stop the job workers before the clients they use go away
+    await JobManager.cleanup()
+    logger.info("Job queue stopped")
+
     await ClientManager.cleanup()
     logger.info("MCP Client cleaned up successfully")
     
     # Clean up vector database connection
-    VectorDatabase.cleanup()
+    await VectorDatabase.cleanup()
     logger.info("Vector database connection closed")
 
 @app.get("/health-check")
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "mcp_sessions": ClientManager.get_session_stats(),
+        "tool_result_cache": ClientManager.get_tool_result_cache().get_stats(),
+        "single_flight": ClientManager.get_single_flight_stats(),
+        "llm_cache": ClientManager.get_llm_cache().get_stats(),
+        "embedding_cache": ClientManager.get_embedding_cache().get_stats(),
+        "vector_db": VectorDatabase.get_stats(),
+        "jobs": JobManager.get_stats(),
+        "summaries": PreprocessService.get_summary_stats(),
+    }
+
 # Include routers
 app.include_router(product_module_router)
 app.include_router(performance_router, prefix="/products", tags=["product-performance"])
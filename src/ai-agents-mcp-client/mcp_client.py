@@ -1,18 +1,94 @@
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional
 from contextlib import AsyncExitStack
+import asyncio
+import logging
+import os
 
+import anyio
+import httpx
 from mcp import ClientSession, StdioServerParameters
+from mcp import types
+from mcp.client.sse import sse_client
 from mcp.client.stdio import stdio_client
-from openai import OpenAI
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from core.tool_catalog import ToolCatalog
+from core.tool_executor import ToolCallResult, ToolExecutor
+from core.tool_result_cache import ToolResultCache
+from core.single_flight import SingleFlight, make_request_key
+from core.llm_cache import LLMResponseCache
+from core.embedding_cache import EmbeddingCache
+from core.tokenizer import get_tokenizer
+from exceptions.service_exceptions import MCPConnectionError
 
-load_dotenv() 
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Failures that mean the transport is gone and the session has to be reopened
+CONNECTION_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    httpx.TransportError,
+    ConnectionError,
+)
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build the keep-alive connection pool shared by every OpenAI call in the process."""
+    return DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", 100)),
+            max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20)),
+            keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", 30)),
+        ),
+        timeout=httpx.Timeout(
+            float(os.getenv("OPENAI_TIMEOUT", 60)),
+            connect=float(os.getenv("OPENAI_CONNECT_TIMEOUT", 5)),
+        ),
+    )
 
 class MCPClient:
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None, tool_executor: Optional[ToolExecutor] = None,
+                 tool_result_cache: Optional[ToolResultCache] = None, llm_single_flight: Optional[SingleFlight] = None,
+                 tool_single_flight: Optional[SingleFlight] = None, llm_cache: Optional[LLMResponseCache] = None,
+                 embedding_cache: Optional[EmbeddingCache] = None):
         self.session: Optional[ClientSession] = None
-        self.exit_stack = AsyncExitStack()
-        self.client = OpenAI()
+        self.in_flight = 0
+        self.total_calls = 0
+        self.tool_catalog = ToolCatalog()
+        self.tool_executor = tool_executor or ToolExecutor()
+        self.tool_result_cache = tool_result_cache or ToolResultCache()
+        self.llm_single_flight = llm_single_flight or SingleFlight()
+        self.tool_single_flight = tool_single_flight or SingleFlight()
+        self.llm_cache = llm_cache or LLMResponseCache()
+        self.embedding_cache = embedding_cache or EmbeddingCache()
+        # Embedding requests of all embed_texts calls on this client running at once
+        self._embedding_slots = asyncio.Semaphore(int(os.getenv("EMBEDDING_MAX_CONCURRENT_BATCHES", 4)))
+        # Only read-only tools may be coalesced, default to the cached ones
+        single_flight_tools = os.getenv("MCP_SINGLE_FLIGHT_TOOLS")
+        self.single_flight_tools = (
+            {name.strip() for name in single_flight_tools.split(",") if name.strip()}
+            if single_flight_tools is not None
+            else set(self.tool_result_cache.tool_ttls)
+        )
+        self._background_tasks = set()
+        self._transport_factory: Optional[Callable[[], Any]] = None
+        self._connection_task: Optional[asyncio.Task] = None
+        self._reconnect_requested = asyncio.Event()
+        self._state_changed = asyncio.Condition()
+        self._failed_rounds = 0
+        self._last_error: Optional[Exception] = None
+        self.connection_generation = 0
+        self.reconnects = 0
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or create_http_client()
+        self.client = AsyncOpenAI(
+            http_client=self.http_client,
+            max_retries=int(os.getenv("OPENAI_MAX_RETRIES", 2)),
+        )
 
     async def connect_to_server(self, server_script_path: str):
         server_params = StdioServerParameters(
@@ -20,13 +96,294 @@ class MCPClient:
             args=[server_script_path],
             env=None
         )
+        self._transport_factory = lambda: stdio_client(server_params)
+        await self._start_connection()
+
+    async def connect_to_url(self, server_url: str, transport: Optional[str] = None):
+        """Connect to a remote MCP server over streamable HTTP (default) or SSE.
+
+        A URL ending in ``/sse`` selects the SSE transport unless ``MCP_SERVER_TRANSPORT``
+        says otherwise.
+        """
+        transport = transport or os.getenv("MCP_SERVER_TRANSPORT") or (
+            "sse" if server_url.rstrip("/").endswith("/sse") else "streamable-http"
+        )
+        auth_token = os.getenv("MCP_SERVER_AUTH_TOKEN")
+        headers = {"Authorization": f"Bearer {auth_token}"} if auth_token else None
+
+        if transport == "sse":
+            self._transport_factory = lambda: sse_client(server_url, headers=headers)
+        elif transport == "streamable-http":
+            self._transport_factory = lambda: streamablehttp_client(server_url, headers=headers)
+        else:
+            raise MCPConnectionError(f"Unsupported MCP transport: {transport}", "MCP_UNSUPPORTED_TRANSPORT")
+        await self._start_connection()
+
+    async def _start_connection(self):
+        """Start the task owning the transport and wait for its first session."""
+        if self._connection_task is None:
+            self._connection_task = asyncio.create_task(self._own_connection())
+        await self.reconnect()
+
+    async def _own_connection(self):
+        # Transport context managers hold anyio cancel scopes, which must be entered and
+        # exited by the same task. This task is the only one that opens, closes and
+        # reopens them; callers just request a reconnect and wait for the next generation.
+        attempts = int(os.getenv("MCP_RECONNECT_ATTEMPTS", 3))
+        failures = 0
+        while True:
+            opened = False
+            try:
+                async with AsyncExitStack() as exit_stack:
+                    # stdio yields (read, write), streamable HTTP also yields a session id getter
+                    streams = await exit_stack.enter_async_context(self._transport_factory())
+                    session = await exit_stack.enter_async_context(
+                        ClientSession(streams[0], streams[1], message_handler=self._handle_message)
+                    )
+                    await session.initialize()
+                    response = await session.list_tools()
+                    self.tool_catalog.load(response.tools)
+                    logger.info(f"Connected to server with tools: {self.tool_catalog.get_tool_names()}")
+
+                    opened, failures = True, 0
+                    async with self._state_changed:
+                        # Requests made while connecting are answered by this session
+                        self._reconnect_requested.clear()
+                        if self.connection_generation:
+                            self.reconnects += 1
+                            logger.info("Reconnected to MCP server")
+                        self.session = session
+                        self.connection_generation += 1
+                        self._state_changed.notify_all()
+
+                    await self._reconnect_requested.wait()
+                    self.session = None
+            except asyncio.CancelledError:
+                self.session = None
+                raise
+            except Exception as e:
+                self.session = None
+                if opened:
+                    # The transport died under an open session, open a new one right away
+                    logger.warning(f"MCP session closed: {e}")
+                    continue
+                failures += 1
+                logger.warning(f"MCP connect attempt {failures}/{attempts} failed: {e}")
+                if failures < attempts:
+                    await asyncio.sleep(0.5 * 2 ** (failures - 1))
+                    continue
+                # Give up until the next caller asks for a connection
+                async with self._state_changed:
+                    self._reconnect_requested.clear()
+                    self._last_error = e
+                    self._failed_rounds += 1
+                    self._state_changed.notify_all()
+                failures = 0
+                await self._reconnect_requested.wait()
+
+    async def reconnect(self, failed_generation: Optional[int] = None):
+        """Wait for a working session, replacing the one of ``failed_generation`` if it is still current."""
+        if self._connection_task is None:
+            raise MCPConnectionError("MCP client was never connected", "MCP_NOT_CONNECTED")
+
+        connection_task = self._connection_task
+        async with self._state_changed:
+            if self.session is not None and failed_generation != self.connection_generation:
+                return
+            failed_rounds = self._failed_rounds
+            current_generation = self.connection_generation
+            self._reconnect_requested.set()
+            await self._state_changed.wait_for(
+                lambda: (self.session is not None and self.connection_generation != current_generation)
+                or self._failed_rounds != failed_rounds
+                or connection_task.done()
+            )
+            if self.session is None:
+                raise MCPConnectionError("Could not connect to MCP server", "MCP_RECONNECT_FAILED") from self._last_error
+
+    def is_read_only_tool(self, name: str) -> bool:
+        return name in self.single_flight_tools or self.tool_result_cache.is_cacheable(name)
+
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        if isinstance(error, CONNECTION_ERRORS):
+            return True
+        return isinstance(error, McpError) and error.error.code == getattr(types, "CONNECTION_CLOSED", -32000)
+
+    async def _call_with_reconnect(self, call: Callable[[], Any], retry: bool):
+        """Run a session call, reopening the session if the transport dropped.
+
+        The call is retried once after reconnecting only when ``retry`` is set,
+        i.e. for read-only operations that are safe to send twice.
+        """
+        if self.session is None:
+            await self.reconnect()
+
+        generation = self.connection_generation
+        try:
+            return await call()
+        except Exception as e:
+            if not self._is_connection_error(e):
+                raise
+            logger.warning(f"MCP connection lost: {e}")
+            await self.reconnect(generation)
+            if not retry:
+                raise MCPConnectionError("MCP connection lost during a non-retryable call", "MCP_CONNECTION_LOST") from e
+            return await call()
+
+    async def _handle_message(self, message):
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ToolListChangedNotification):
+            # The handler runs inside the session's receive loop, so the refresh
+            # has to happen in its own task or list_tools would wait on itself.
+            task = asyncio.create_task(self.refresh_tool_catalog())
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+    async def refresh_tool_catalog(self) -> ToolCatalog:
+        try:
+            response = await self.list_tools()
+            self.tool_catalog.load(response.tools)
+        except Exception as e:
+            logger.error(f"Failed to refresh tool catalog: {e}")
+            raise
+        return self.tool_catalog
+
+    async def get_tool_catalog(self) -> ToolCatalog:
+        if not self.tool_catalog.loaded:
+            await self.refresh_tool_catalog()
+        return self.tool_catalog
+
+    async def list_tools(self):
+        self.in_flight += 1
+        self.total_calls += 1
+        try:
+            return await self._call_with_reconnect(lambda: self.session.list_tools(), retry=True)
+        finally:
+            self.in_flight -= 1
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None):
+        if self.tool_result_cache.is_cacheable(name):
+            found, result = self.tool_result_cache.get(name, arguments)
+            if found:
+                return result
+
+        if name in self.single_flight_tools:
+            return await self.tool_single_flight.do(
+                make_request_key(name, arguments),
+                lambda: self._call_session_tool(name, arguments),
+            )
+        return await self._call_session_tool(name, arguments)
+
+    async def _call_session_tool(self, name: str, arguments: Optional[Dict[str, Any]]):
+        generation = self.tool_result_cache.start_read()
+        self.in_flight += 1
+        self.total_calls += 1
+        try:
+            result = await self._call_with_reconnect(
+                lambda: self.session.call_tool(name, arguments),
+                retry=self.is_read_only_tool(name),
+            )
+        finally:
+            self.in_flight -= 1
+
+        if self.tool_result_cache.is_cacheable(name) and not result.isError:
+            self.tool_result_cache.set(name, arguments, result, generation=generation)
+        return result
+
+    async def create_chat_completion(self, cache_endpoint: Optional[str] = None, bypass_cache: bool = False, **kwargs):
+        """Create a chat completion, sharing one upstream request between identical concurrent calls.
+
+        Endpoints opted into the response cache pass ``cache_endpoint``. ``bypass_cache``
+        skips the lookup but still stores the fresh response.
+        """
+        key = make_request_key(kwargs)
+        use_cache = self.llm_cache.is_enabled_for(cache_endpoint)
+        if use_cache and not bypass_cache:
+            cached_response = await self.llm_cache.get(key)
+            if cached_response is not None:
+                return cached_response
+
+        response = await self.llm_single_flight.do(
+            key,
+            lambda: self.client.chat.completions.create(**kwargs),
+        )
+        if use_cache:
+            await self.llm_cache.set(cache_endpoint, key, response)
+        return response
+
+    async def embed_texts(self, texts: List[str], model: str = "text-embedding-3-large",
+                          dimensions: Optional[int] = None) -> List[List[float]]:
+        """Embed texts, serving repeated texts from the embedding cache.
+
+        Cache misses are sent in batches of at most ``EMBEDDING_MAX_BATCH_SIZE`` inputs,
+        at most ``EMBEDDING_MAX_CONCURRENT_BATCHES`` at a time. Inputs longer than
+        ``EMBEDDING_MAX_INPUT_TOKENS`` are embedded from their leading tokens instead of
+        failing the request. The returned vectors are aligned with ``texts``.
+        ``dimensions`` defaults to ``EMBEDDING_DIMENSIONS``, unset keeps the model's native width.
+        """
+        # Vectors depend on the requested width, the model's native width is keyed as 0
+        dimensions = dimensions or int(os.getenv("EMBEDDING_DIMENSIONS", 0))
+        # Shortened text-embedding-3 vectors are truncated and renormalised by the API itself
+        options = {"dimensions": dimensions} if dimensions else {}
+        vectors = await self.embedding_cache.get_many(model, dimensions, texts)
+
+        missing_texts = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing_texts:
+            batch_size = max(1, int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", 256)))
+            batches = [missing_texts[start:start + batch_size] for start in range(0, len(missing_texts), batch_size)]
+            max_tokens = int(os.getenv("EMBEDDING_MAX_INPUT_TOKENS", 8191))
+
+            async def embed_batch(batch: List[str]):
+                async with self._embedding_slots:
+                    return await self.client.embeddings.create(
+                        model=model, input=[self._fit_embedding_input(text, max_tokens) for text in batch], **options
+                    )
+
+            responses = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+
+            embedded = {}
+            for batch, response in zip(batches, responses):
+                # The API may return items out of order, each one carries its input index
+                for item in response.data:
+                    embedded[batch[item.index]] = item.embedding
+
+            await self.embedding_cache.set_many(model, dimensions, missing_texts, [embedded[text] for text in missing_texts])
+            vectors = [vector if vector is not None else embedded[text] for text, vector in zip(texts, vectors)]
+        return vectors
+
+    @staticmethod
+    def _fit_embedding_input(text: str, max_tokens: int) -> str:
+        # One input over the model's limit would fail its whole batch
+        tokenizer = get_tokenizer()
+        if tokenizer.count(text) <= max_tokens:
+            return text
+        logger.warning(f"Embedding input of {len(text)} characters exceeds {max_tokens} tokens, truncating it")
+        return tokenizer.split(text, max_tokens)[0]
+
+    def invalidate_tool_results(self, arguments: Dict[str, Any]) -> int:
+        return self.tool_result_cache.invalidate_matching(arguments)
 
-        stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
-        self.stdio, self.write = stdio_transport
-        self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
+    async def execute_tool_calls(self, tool_calls) -> List[ToolCallResult]:
+        return await self.tool_executor.execute(self.call_tool, tool_calls)
 
-        await self.session.initialize()
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.session is not None,
+            "in_flight": self.in_flight,
+            "total_calls": self.total_calls,
+            "tool_catalog_version": self.tool_catalog.version,
+            "reconnects": self.reconnects,
+        }
 
-        response = await self.session.list_tools()
-        tools = response.tools
-        print("\nConnected to server with tools:", [tool.name for tool in tools])
\ No newline at end of file
+    async def cleanup(self):
+        if self._connection_task is not None:
+            # The owner task closes the transport it opened
+            self._connection_task.cancel()
+            await asyncio.gather(self._connection_task, return_exceptions=True)
+            # Release callers still waiting for a session
+            async with self._state_changed:
+                self._state_changed.notify_all()
+            self._connection_task = None
+        # The HTTP pool may be shared with other clients, only close it if we created it
+        if self._owns_http_client:
+            await self.client.close()
@@ -12,5 +12,8 @@ class AdjustmentSuggestion(BaseModel):
 
 class ApprovalRequest(BaseModel):
     order_id: str
+    # Copied from the order, approvals invalidate cached reads of them
+    customer_id: Optional[str] = None
+    products: Any = None
     suggested_adjustments: Optional[List[AdjustmentSuggestion]] = []
     description: Optional[str] = ""
\ No newline at end of file
@@ -3,6 +3,7 @@ import json
 import asyncio
 import logging
 from mcp.types import TextContent  # Ensure this import is at the top of your file
+from core.tool_executor import build_tool_messages
 
 class OrderProcessingService:
     def __init__(self, mcp_client):
@@ -12,15 +13,8 @@ class OrderProcessingService:
     async def create_process_order_request(self, order: Order):
         try:
             # #Step 1: Listing availables and suitable tools
-            tools_response = await self.mcp_client.session.list_tools()
-            available_tools = [{
-                "type": "function",
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": tool.inputSchema
-                }
-            } for tool in tools_response.tools]
+            tool_catalog = await self.mcp_client.get_tool_catalog()
+            available_tools = tool_catalog.openai_tools
 
             system_prompt = """
                 You are a order processing agent. 
@@ -34,7 +28,7 @@ class OrderProcessingService:
                 {"role": "user", "content": order.model_dump_json()}
             ]
 
-            response = self.mcp_client.client.chat.completions.create(
+            response = await self.mcp_client.create_chat_completion(
                 model="gpt-4o",
                 messages=messages,
                 tools=available_tools
@@ -42,41 +36,12 @@ class OrderProcessingService:
 
             print(response.choices[0].message.tool_calls)
 
-            tool_results = {}
-            if response.choices[0].message.tool_calls:
-                for tc1 in response.choices[0].message.tool_calls:
-                    tool_name = tc1.function.name
-                    tool_args = json.loads(tc1.function.arguments)
-                    tool_result = await self.mcp_client.session.call_tool(tool_name, tool_args)
-                    tool_results[tool_name] = tool_result.content
+            # The context tools are read-only and independent, so they run concurrently
+            tool_call_results = await self.mcp_client.execute_tool_calls(response.choices[0].message.tool_calls)
 
             # #Step 1.5: Storing tool results in a structured format
-            tool_analyzed_result_messages = []
+            tool_analyzed_result_messages = build_tool_messages(tool_call_results)
 
-            tool_analyzed_result_messages.append({
-                "role": "assistant",
-                "content": None,
-                "tool_calls": [
-                    {
-                        "id": tc2.id,
-                        "type": "function",
-                        "function": {
-                            "name": tc2.function.name,
-                            "arguments": tc2.function.arguments
-                        }
-                    } for tc2 in response.choices[0].message.tool_calls
-                ] 
-            })
-
-            for tc3 in response.choices[0].message.tool_calls:
-                tool_name = tc3.function.name
-                result = tool_results.get(tool_name, None)
-                if result:
-                    tool_analyzed_result_messages.append({
-                        "tool_call_id": tc3.id,
-                        "role": "tool",
-                        "content": result,
-                    })
             # #Step 2: Listing processes to be done to process the order        
             processing_prompt = """
                 Based on the tool results, list the all the processes needed to be done to process the order.
@@ -106,25 +71,15 @@ class OrderProcessingService:
             
             processing_messages.extend(tool_analyzed_result_messages)
 
-            available_tools_prompt = "Available tools:\n"
-            for index, tool in enumerate(available_tools):
-                available_tools_prompt += f"""
-                {index + 1}/{len(available_tools)}:
-                    - Tool name: {tool['function']['name']}
-                    - Tool description: {tool['function']['description']}
-                    - Tool input schema: {tool['function']['parameters']}
-                \n
-                """  
-
             processing_messages.append({
                 "role": "system",
-                "content": available_tools_prompt
+                "content": tool_catalog.tools_prompt
             })
 
             print(processing_messages)
             print("_______________________")
 
-            processing_response = self.mcp_client.client.chat.completions.create(
+            processing_response = await self.mcp_client.create_chat_completion(
                 model="gpt-4o",
                 messages=processing_messages,
             )
@@ -153,7 +108,7 @@ class OrderProcessingService:
                 completion_result = None
 
                 try:
-                    completion_result = self.mcp_client.client.chat.completions.create(
+                    completion_result = await self.mcp_client.create_chat_completion(
                         model="gpt-4o-mini",
                         messages=messages,
                         tools=available_tools
@@ -173,6 +128,8 @@ class OrderProcessingService:
                 if completed_result.choices[0].message.content is not None:
                     process_list.append(ApprovalRequest(
                         order_id=order.order_id,
+                        customer_id=order.customer_id,
+                        products=order.products,
                         description=completed_result.choices[0].message.content
                     ))
                     continue
@@ -181,6 +138,8 @@ class OrderProcessingService:
                     tool_args = json.loads(tool_call.function.arguments)
                     approval_request = ApprovalRequest(
                         order_id=order.order_id,
+                        customer_id=order.customer_id,
+                        products=order.products,
                         suggested_adjustments=[
                             AdjustmentSuggestion(
                                 type=tool_call.function.name,
@@ -196,11 +155,18 @@ class OrderProcessingService:
             self.logger.error(f"Error in create_process_order_request: {e}")
             raise e
         
+    @staticmethod
+    def _product_identifiers(products):
+        # Orders list products as objects with their own id keys or as bare product IDs
+        if isinstance(products, list):
+            return [product if isinstance(product, dict) else {"product_id": product} for product in products]
+        return products
+
     async def order_processing_approval(self, approval_request: ApprovalRequest):
         results = []
         for adjustment in approval_request.suggested_adjustments:
             try:
-                result = await self.mcp_client.session.call_tool(adjustment.type, adjustment.suggested_value)
+                result = await self.mcp_client.call_tool(adjustment.type, adjustment.suggested_value)
                 results.append({
                     "type": adjustment.type,
                     "success": True,
@@ -213,6 +179,14 @@ class OrderProcessingService:
                     "success": False,
                     "error": str(e)
                 })
+            finally:
+                # Cached reads of the customer/products touched by the order are now stale
+                self.mcp_client.invalidate_tool_results({
+                    **(adjustment.suggested_value if isinstance(adjustment.suggested_value, dict) else {}),
+                    "order_id": approval_request.order_id,
+                    "customer_id": approval_request.customer_id,
+                    "products": self._product_identifiers(approval_request.products),
+                })
 
         return {
             "order_id": approval_request.order_id,
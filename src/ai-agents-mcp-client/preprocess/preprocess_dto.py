@@ -1,10 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
-
-class AddDocsToCollectionDto(BaseModel):
-    texts: list[str]
-    collection_name: str
-    metadatas: List[Optional[dict]] = []
 
 class SummaryContentDto(BaseModel):
-    content: str
\ No newline at end of file
+    content: str
+    bypass_cache: bool = False
\ No newline at end of file
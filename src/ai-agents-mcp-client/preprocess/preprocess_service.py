@@ -1,40 +1,76 @@
-from .preprocess_dto import AddDocsToCollectionDto, SummaryContentDto
-from core.vector_db import VectorDatabase
+from .preprocess_dto import SummaryContentDto
+from collections import OrderedDict
+from core.single_flight import SingleFlight
 from mcp_client import MCPClient
-from langchain_openai import OpenAIEmbeddings, OpenAI
-import logging
+from typing import Any, Dict, List, Optional
+import asyncio
+import hashlib
+import os
 
 class PreprocessService:
-    embedding_client: OpenAIEmbeddings
-    client: OpenAI
+    mcp_client: MCPClient
+    # Shared by every instance: services are created per request, while the same
+    # boilerplate paragraphs (shipping, warranty, ...) recur across many products
+    _summary_memo: "OrderedDict[str, str]" = OrderedDict()
+    _summary_flight = SingleFlight()
+    _summary_semaphore: Optional[asyncio.Semaphore] = None
+    summary_memo_hits = 0
+    summary_memo_misses = 0
 
     def __init__(self, mcp_client: MCPClient):
-        self.client = mcp_client.client
-        self.embedding_client = OpenAIEmbeddings(
-            model="text-embedding-3-large",
-        )
+        self.mcp_client = mcp_client
 
-    async def add_docs(self, payload: AddDocsToCollectionDto):
-        metadatas = payload.metadatas
-        embeddings = await self.get_embedding_docs(payload.texts)
+    @classmethod
+    def _get_summary_semaphore(cls) -> asyncio.Semaphore:
+        if cls._summary_semaphore is None:
+            cls._summary_semaphore = asyncio.Semaphore(int(os.getenv("SUMMARY_CONCURRENCY", 4)))
+        return cls._summary_semaphore
 
-        data = []
+    @classmethod
+    def _remember_summary(cls, key: str, summary: str):
+        cls._summary_memo[key] = summary
+        cls._summary_memo.move_to_end(key)
+        while len(cls._summary_memo) > int(os.getenv("SUMMARY_MEMO_MAX_ENTRIES", 10000)):
+            cls._summary_memo.popitem(last=False)
 
-        for i, embedding in enumerate(embeddings):
-            embedding = embedding if payload.texts[i] else [0] * len(embedding)
-            doc_data = {
-                "embedding": embedding,
-                "metadata": metadatas[i]
-            }
-            data.append(doc_data)
+    async def summarize(self, content: str) -> str:
+        """Summary of the content, memoized by content hash and capped at SUMMARY_CONCURRENCY calls."""
+        cls = type(self)
+        key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        summary = cls._summary_memo.get(key)
+        if summary is not None:
+            cls._summary_memo.move_to_end(key)
+            cls.summary_memo_hits += 1
+            return summary
 
-        VectorDatabase.batch_store_embeddings(
-            collection_name=payload.collection_name,
-            keyword_embeddings=data
-        )
+        cls.summary_memo_misses += 1
+
+        async def summarize_limited():
+            async with cls._get_summary_semaphore():
+                return await self.summary_content(SummaryContentDto(content=content))
+
+        # Products ingested concurrently often share a paragraph, only one of them calls the model
+        summary = await cls._summary_flight.do(key, summarize_limited)
+        if summary:
+            cls._remember_summary(key, summary)
+        return summary
+
+    async def summarize_many(self, contents: List[str]) -> List[str]:
+        return list(await asyncio.gather(*(self.summarize(content) for content in contents)))
+
+    @classmethod
+    def get_summary_stats(cls) -> Dict[str, Any]:
+        return {
+            "memo_size": len(cls._summary_memo),
+            "memo_hits": cls.summary_memo_hits,
+            "memo_misses": cls.summary_memo_misses,
+            "single_flight": cls._summary_flight.get_stats(),
+        }
 
     async def summary_content(self, request: SummaryContentDto):
-        response = await self.client.chat.completions.create(
+        response = await self.mcp_client.create_chat_completion(
+            cache_endpoint="summary_content",
+            bypass_cache=request.bypass_cache,
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": """
@@ -66,12 +102,3 @@ class PreprocessService:
             ]
         )
         return response.choices[0].message.content
-    
-    async def get_embedding_docs(self, texts: list[str]):
-        try:
-            embeddings = await self.embedding_client.aembed_documents(texts)
-            if embeddings:
-                return embeddings
-        except Exception as e:
-            logging.error(f"Failed to get embedding: {e}")
-            return None
\ No newline at end of file
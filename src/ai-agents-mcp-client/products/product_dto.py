@@ -5,6 +5,7 @@ class ProductRequest(BaseModel):
     title: str
     description: str
     image_url: Optional[str] = None
+    bypass_cache: bool = False
 
 class ProductFeature(BaseModel):
     feature: str
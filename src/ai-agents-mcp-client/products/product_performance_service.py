@@ -9,6 +9,7 @@ from .product_dto import (
 import re
 
 from mcp_client import MCPClient
+from core.tool_executor import build_tool_messages
 import logging
 
 class ProductPerformanceService:
@@ -24,15 +25,8 @@ class ProductPerformanceService:
                 "current_state": request.productDetails
             }
 
-            tools_response = await self.mcp_client.session.list_tools()
-            available_tools = [{
-                "type": "function",
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": tool.inputSchema
-                }
-            } for tool in tools_response.tools]
+            tool_catalog = await self.mcp_client.get_tool_catalog()
+            available_tools = tool_catalog.openai_tools
 
             # Different system prompts based on whether this is a new product or existing product
             system_prompt = """You are a product performance analyst. Analyze the product's performance and suggest improvements.
@@ -75,52 +69,18 @@ class ProductPerformanceService:
             ]
 
         
-            completion = self.mcp_client.client.chat.completions.create(
+            completion = await self.mcp_client.create_chat_completion(
                 model="gpt-4o-mini",
                 messages=messages,
                 tools=available_tools,
                 tool_choice="auto"
             )
         
-            # Process each tool call and gather data
-            tool_results = {}
-            if completion.choices[0].message.tool_calls:
-                for tool_call in completion.choices[0].message.tool_calls:
-                    tool_name = tool_call.function.name
-                    tool_args = json.loads(tool_call.function.arguments)
-                    tool_result = await self.mcp_client.session.call_tool(tool_name, tool_args)
-                    self.logger.info(f"Tool call result: {tool_result}")
-                    tool_results[tool_name] = tool_result.content
-                    
+            # Run the requested tool calls concurrently, results keep the tool call order
+            tool_call_results = await self.mcp_client.execute_tool_calls(completion.choices[0].message.tool_calls)
+
             # Make a follow-up request with the data from tool calls
-            follow_up_messages = messages.copy()
-            
-            # Add assistant's tool call message
-            follow_up_messages.append({
-                "role": "assistant",
-                "content": None,
-                "tool_calls": [
-                    {
-                        "id": tool_call.id,
-                        "type": "function",
-                        "function": {
-                            "name": tool_call.function.name,
-                            "arguments": tool_call.function.arguments
-                        }
-                    } for tool_call in completion.choices[0].message.tool_calls
-                ]
-            })
-            
-            # Add tool results as tool response messages
-            for tool_call in completion.choices[0].message.tool_calls:
-                tool_name = tool_call.function.name
-                result = tool_results.get(tool_name, None)
-                if result:
-                    follow_up_messages.append({
-                        "tool_call_id": tool_call.id,
-                        "role": "tool",
-                        "content": result,
-                    })
+            follow_up_messages = messages + build_tool_messages(tool_call_results)
             
             # Different follow-up prompts based on whether this is a new product or existing product
             follow_up_prompt = """Based on this data, please provide a comprehensive analysis of the product's performance decline."""
@@ -131,7 +91,7 @@ class ProductPerformanceService:
                 If the opportunity score is 8 or higher, provide detailed launch recommendations including optimal pricing, initial inventory, and positioning strategy."""
 
             # Make follow-up request for analysis
-            analysis_completion = self.mcp_client.client.chat.completions.create(
+            analysis_completion = await self.mcp_client.create_chat_completion(
                 model="gpt-4o-mini",
                 messages=follow_up_messages + [{
                     "role": "user",
@@ -143,7 +103,7 @@ class ProductPerformanceService:
             # For new products with high opportunity, get launch plan details
             if request.performanceChange > 0:
                 # Existing product flow
-                suggested_adjustments_completion = self.mcp_client.client.chat.completions.create(
+                suggested_adjustments_completion = await self.mcp_client.create_chat_completion(
                     model="gpt-4o-mini",
                     messages=follow_up_messages+ [{
                         "role": "user",
@@ -182,7 +142,7 @@ class ProductPerformanceService:
                 analysis_result = analysis_completion.choices[0].message.content or ""
                 
                 # High opportunity - generate launch plan
-                launch_plan_completion = self.mcp_client.client.chat.completions.create(
+                launch_plan_completion = await self.mcp_client.create_chat_completion(
                     model="gpt-4o-mini",
                     messages=follow_up_messages + [{
                         "role": "user",
@@ -241,7 +201,7 @@ class ProductPerformanceService:
         results = []
         for adjustment in approval_request.suggested_adjustments:
             try:
-                result = await self.mcp_client.session.call_tool(adjustment.type, adjustment.suggested_value)
+                result = await self.mcp_client.call_tool(adjustment.type, adjustment.suggested_value)
                 results.append({
                     "type": adjustment.type,
                     "success": True,
@@ -254,6 +214,12 @@ class ProductPerformanceService:
                     "success": False,
                     "error": str(e)
                 })
+            finally:
+                # Cached reads of the adjusted product are stale whether or not the call succeeded
+                self.mcp_client.invalidate_tool_results({
+                    **(adjustment.suggested_value if isinstance(adjustment.suggested_value, dict) else {}),
+                    "product_id": approval_request.product_id,
+                })
 
         return {
             "product_id": approval_request.product_id,
@@ -1,6 +1,6 @@
 from .product_dto import ProductRequest, ProductResponse, ProductFeature
 from mcp_client import MCPClient
-import json
+from core.tool_executor import build_tool_messages
 
 class ProductService:
     def __init__(self, mcp_client: MCPClient):
@@ -27,18 +27,16 @@ Please analyze this product and classify it into the appropriate category."""
         ]
 
         # Get available tools from MCP server
-        tools_response = await self.mcp_client.session.list_tools()
-        available_tools = [{
-            "name": tool.name,
-            "description": tool.description,
-            "parameters": tool.inputSchema
-        } for tool in tools_response.tools]
+        tool_catalog = await self.mcp_client.get_tool_catalog()
+        available_tools = tool_catalog.openai_tools
 
         reasoning_chain = []
         features = []
         
         # Step 1: Initial analysis
-        completion = await self.mcp_client.client.chat.completions.create(
+        completion = await self.mcp_client.create_chat_completion(
+            cache_endpoint="categorize_product",
+            bypass_cache=request.bypass_cache,
             model="gpt-4o-mini",
             messages=messages,
             tools=available_tools,
@@ -48,28 +46,14 @@ Please analyze this product and classify it into the appropriate category."""
         # Process the initial analysis
         for choice in completion.choices:
             if choice.message.tool_calls:
-                for tool_call in choice.message.tool_calls:
-                    tool_args = json.loads(tool_call.function.arguments)
-                    
-                    # Execute tool call
-                    tool_result = await self.mcp_client.session.call_tool(
-                        tool_call.function.name, 
-                        tool_args
-                    )
-                    
-                    # Add tool results to messages
-                    messages.append({
-                        "role": "assistant",
-                        "content": None,
-                        "tool_calls": [tool_call]
-                    })
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": json.dumps(tool_result.content)
-                    })
-                    
-                    reasoning_chain.append(f"Tool {tool_call.function.name} called: {tool_result.content}")
+                # Execute the tool calls concurrently, results keep the tool call order
+                tool_call_results = await self.mcp_client.execute_tool_calls(choice.message.tool_calls)
+
+                # Add tool results to messages
+                messages.extend(build_tool_messages(tool_call_results))
+
+                for tool_call_result in tool_call_results:
+                    reasoning_chain.append(f"Tool {tool_call_result.tool_call.function.name} called: {tool_call_result.content}")
             else:
                 content = choice.message.content
                 reasoning_chain.append(content)
@@ -91,7 +75,9 @@ Please analyze this product and classify it into the appropriate category."""
             "content": "Based on the analysis above, what is the final category classification? Please provide:\n1. Category name\n2. Confidence score (0-1)\n3. Final explanation"
         })
 
-        final_completion = await self.mcp_client.client.chat.completions.create(
+        final_completion = await self.mcp_client.create_chat_completion(
+            cache_endpoint="categorize_product",
+            bypass_cache=request.bypass_cache,
             model="gpt-4o-mini",
             messages=messages
         )
@@ -0,0 +1,350 @@
+"""Streaming bulk ingestion of a product catalog into the vector index.
+
+Products are read as NDJSON, one ``GetEmbeddingsRequest`` object per line, and
+flow through three pipelined stages connected by bounded queues:
+
+    prepare (chunk + summarize) -> embed -> store (upsert + stale deletes)
+
+Each stage runs its own pool of workers. A full queue blocks the stage feeding
+it, all the way back to the reader, so memory stays flat whatever the catalog
+size. An optional checkpoint file records how far into the input every product
+is confirmed written, so a run over the same input resumes from there.
+
+Run from ``src/ai-agents-mcp-client``:
+
+    python -m recommendations.bulk_ingest catalog.ndjson --checkpoint catalog.checkpoint
+"""
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Optional, Set, TextIO, Tuple, Union
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+from core.vector_db import VectorDatabase
+from .recommendations_dto import GetEmbeddingsRequest
+
+logger = logging.getLogger(__name__)
+
+# Ends a stage's input, one per worker
+_DONE = object()
+
+@dataclass
+class IngestionReport:
+    products: int = 0
+    skipped: int = 0
+    failed: int = 0
+    vectors: int = 0
+    deleted: int = 0
+    summarized: int = 0
+    # Summed per-product summarization wall time
+    summary_seconds: float = 0.0
+    seconds: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def products_per_second(self) -> float:
+        return self.products / self.seconds if self.seconds else 0.0
+
+    @property
+    def vectors_per_second(self) -> float:
+        return self.vectors / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "products": self.products,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "vectors": self.vectors,
+            "deleted": self.deleted,
+            "summarized": self.summarized,
+            "summary_seconds": round(self.summary_seconds, 3),
+            "seconds": round(self.seconds, 3),
+            "products_per_second": round(self.products_per_second, 2),
+            "vectors_per_second": round(self.vectors_per_second, 2),
+            "errors": self.errors,
+        }
+
+async def iter_ndjson_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream, e.g. an HTTP request body, into lines without buffering all of it."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    if buffer:
+        yield buffer.decode("utf-8")
+
+def checkpoint_path_for(name: Optional[str]) -> Optional[str]:
+    """Checkpoint file for a client supplied name, confined to BULK_INGEST_CHECKPOINT_DIR."""
+    if not name:
+        return None
+    directory = os.getenv("BULK_INGEST_CHECKPOINT_DIR", "checkpoints")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]", "_", name).lstrip(".") + ".checkpoint")
+
+class IngestionCheckpoint:
+    """Resume position of an ingestion run over one input.
+
+    Holds the number of leading input lines that are finished, the keys of
+    finished products past that line and the keys of failed products, so its
+    size follows the products in flight and failed rather than the catalog.
+    Keys combine the product ID and the record hash: failed products are retried
+    on resume, and a product whose record changed is not mistaken for them.
+    Resuming only makes sense with the same input.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.line = 0
+        self.done: Set[str] = set()
+        self.failed: Set[str] = set()
+        if path and os.path.exists(path):
+            with open(path) as checkpoint_file:
+                content = checkpoint_file.read()
+            try:
+                state = json.loads(content)
+                self.line, self.done, self.failed = state["line"], set(state["done"]), set(state["failed"])
+            except ValueError:
+                # Checkpoints used to list every finished key, one per line
+                self.done = {line.strip() for line in content.splitlines() if line.strip()}
+
+    @staticmethod
+    def make_key(product_id: str, line: str) -> str:
+        return f"{product_id}:{hashlib.sha256(line.encode('utf-8')).hexdigest()[:16]}"
+
+    def is_done(self, line_number: int, key: str) -> bool:
+        if line_number < self.line:
+            return key not in self.failed
+        return key in self.done
+
+    def save(self, line: int, done: Iterable[str], failed: Iterable[str]):
+        self.line, self.done, self.failed = line, set(done), set(failed)
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as checkpoint_file:
+            json.dump({"line": self.line, "done": sorted(self.done), "failed": sorted(self.failed)}, checkpoint_file)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(tmp_path, self.path)
+
+class BulkIngestionPipeline:
+    def __init__(self, service, checkpoint_path: Optional[str] = None, prepare_workers: Optional[int] = None,
+                 embed_workers: Optional[int] = None, store_workers: Optional[int] = None,
+                 queue_size: Optional[int] = None, checkpoint_every: int = 100, report_interval: float = 10.0):
+        self.service = service
+        self.checkpoint = IngestionCheckpoint(checkpoint_path)
+        self.prepare_workers = prepare_workers or int(os.getenv("BULK_INGEST_PREPARE_WORKERS", 8))
+        self.embed_workers = embed_workers or int(os.getenv("BULK_INGEST_EMBED_WORKERS", 4))
+        self.store_workers = store_workers or int(os.getenv("BULK_INGEST_STORE_WORKERS", 2))
+        self.queue_size = queue_size or int(os.getenv("BULK_INGEST_QUEUE_SIZE", 32))
+        self.checkpoint_every = checkpoint_every
+        self.report_interval = report_interval
+        self.report = IngestionReport()
+        # Products move through the stages with their (line number, checkpoint key) position
+        self._lines_read = 0
+        self._open: Dict[int, str] = {}
+        self._done: Dict[int, str] = {}
+        self._failed: Set[str] = set(self.checkpoint.failed)
+        # (position, ingestion) of stored products whose writes are not confirmed yet
+        self._unflushed = []
+        self._commit_lock = asyncio.Lock()
+
+    async def _read(self, lines: Union[Iterable[str], AsyncIterable[str]], output: asyncio.Queue):
+        async def iterate() -> AsyncIterator[str]:
+            if hasattr(lines, "__aiter__"):
+                async for line in lines:
+                    yield line
+            else:
+                for line in lines:
+                    yield line
+
+        async for line in iterate():
+            # Every input line counts, so line numbers match between runs over the same input
+            line_number, self._lines_read = self._lines_read, self._lines_read + 1
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = GetEmbeddingsRequest.model_validate_json(line)
+            except Exception as e:
+                self.report.failed += 1
+                logger.error(f"Skipping invalid catalog line {line_number + 1}: {str(e)}")
+                continue
+            key = IngestionCheckpoint.make_key(request.product_id, line)
+            if self.checkpoint.is_done(line_number, key):
+                # Stays listed while lines before it are still open
+                if line_number >= self.checkpoint.line:
+                    self._done[line_number] = key
+                self.report.skipped += 1
+                continue
+            self._open[line_number] = key
+            await output.put(((line_number, key), request))
+
+    async def _prepare(self, input: asyncio.Queue, output: asyncio.Queue):
+        while (item := await input.get()) is not _DONE:
+            position, request = item
+            try:
+                await output.put((position, await self.service.prepare_product(request)))
+            except Exception as e:
+                self._fail(position, request.product_id, "prepare", e)
+
+    async def _embed(self, input: asyncio.Queue, output: asyncio.Queue):
+        while (item := await input.get()) is not _DONE:
+            position, ingestion = item
+            try:
+                await self.service.embed_product(ingestion)
+                await output.put((position, ingestion))
+            except Exception as e:
+                self._fail(position, ingestion.product_id, "embed", e)
+
+    async def _store(self, input: asyncio.Queue):
+        while (item := await input.get()) is not _DONE:
+            position, ingestion = item
+            try:
+                await self.service.store_product(ingestion)
+            except Exception as e:
+                self._fail(position, ingestion.product_id, "store", e)
+                continue
+            self._unflushed.append((position, ingestion))
+            if len(self._unflushed) >= self.checkpoint_every:
+                await self._commit_checkpoint()
+
+    async def _commit_checkpoint(self):
+        """Confirm stored products once their own buffered vectors are written, and save the checkpoint."""
+        async with self._commit_lock:
+            stored, self._unflushed = self._unflushed, []
+            # Waits on each product's write ticket, batches are still cut by size or interval
+            results = await asyncio.gather(
+                *(VectorDatabase.flush([ingestion.write_ticket]) for _, ingestion in stored), return_exceptions=True
+            )
+            for (position, ingestion), error in zip(stored, results):
+                if isinstance(error, Exception):
+                    self._fail(position, ingestion.product_id, "store", error)
+                    continue
+                line_number, key = position
+                del self._open[line_number]
+                self._done[line_number] = key
+                self._failed.discard(key)
+                self.report.products += 1
+                self.report.vectors += len(ingestion.documents)
+                self.report.deleted += len(ingestion.stale_ids)
+                self.report.summarized += ingestion.summarized
+                self.report.summary_seconds += ingestion.summary_seconds
+
+            # Every line before the first open one is finished, only later finished products are listed
+            cursor = min(self._open, default=self._lines_read)
+            self._done = {line_number: key for line_number, key in self._done.items() if line_number >= cursor}
+            self.checkpoint.save(cursor, self._done.values(), self._failed)
+
+    def _fail(self, position: Tuple[int, str], product_id: str, stage: str, error: Exception):
+        line_number, key = position
+        self._open.pop(line_number, None)
+        self._failed.add(key)
+        self.report.failed += 1
+        self.report.errors[product_id] = f"{stage}: {error}"
+        logger.error(f"Bulk ingestion of product {product_id} failed in {stage}: {str(error)}")
+
+    async def _report_progress(self, started: float):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"Bulk ingestion: {self.report.products} products ({self.report.products / elapsed:.1f}/s), "
+                f"{self.report.vectors} vectors ({self.report.vectors / elapsed:.1f}/s), "
+                f"{self.report.skipped} skipped, {self.report.failed} failed"
+            )
+
+    @staticmethod
+    async def _stage(workers, output: Optional[asyncio.Queue], count: int):
+        await asyncio.gather(*workers)
+        # Every worker of the next stage stops on its own sentinel
+        if output is not None:
+            for _ in range(count):
+                await output.put(_DONE)
+
+    async def run(self, lines: Union[Iterable[str], AsyncIterable[str]]) -> IngestionReport:
+        started = time.perf_counter()
+        prepare_queue = asyncio.Queue(self.queue_size)
+        embed_queue = asyncio.Queue(self.queue_size)
+        store_queue = asyncio.Queue(self.queue_size)
+
+        async def read():
+            await self._read(lines, prepare_queue)
+            for _ in range(self.prepare_workers):
+                await prepare_queue.put(_DONE)
+
+        reporter = asyncio.create_task(self._report_progress(started))
+        stages = [asyncio.create_task(stage) for stage in (
+            read(),
+            self._stage([self._prepare(prepare_queue, embed_queue) for _ in range(self.prepare_workers)],
+                        embed_queue, self.embed_workers),
+            self._stage([self._embed(embed_queue, store_queue) for _ in range(self.embed_workers)],
+                        store_queue, self.store_workers),
+            self._stage([self._store(store_queue) for _ in range(self.store_workers)], None, 0),
+        )]
+        try:
+            await asyncio.gather(*stages)
+        except Exception:
+            # E.g. the input stream broke, workers downstream would wait on their queues forever
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            # Products stored before the failure are still checkpointed, a resume skips them
+            await self._commit_checkpoint()
+            raise
+        finally:
+            reporter.cancel()
+        await self._commit_checkpoint()
+
+        self.report.seconds = time.perf_counter() - started
+        logger.info(f"Bulk ingestion finished: {self.report.to_dict()}")
+        return self.report
+
+async def iter_file_lines(file: TextIO, chunk_bytes: int = 1 << 20) -> AsyncIterator[str]:
+    """Read a text file or stdin in chunks on a worker thread, so the event loop keeps running."""
+    while lines := await asyncio.to_thread(file.readlines, chunk_bytes):
+        for line in lines:
+            yield line
+
+async def _main(args):
+    from mcp_client import MCPClient
+    from .recommendations_service import RecommendationsService
+
+    VectorDatabase.initialize()
+    mcp_client = MCPClient()
+    try:
+        pipeline = BulkIngestionPipeline(
+            RecommendationsService(mcp_client),
+            checkpoint_path=args.checkpoint,
+            prepare_workers=args.prepare_workers,
+            embed_workers=args.embed_workers,
+            store_workers=args.store_workers,
+            queue_size=args.queue_size,
+        )
+        with (sys.stdin if args.catalog == "-" else open(args.catalog)) as catalog:
+            report = await pipeline.run(iter_file_lines(catalog))
+        print(json.dumps(report.to_dict(), indent=2))
+    finally:
+        await VectorDatabase.cleanup()
+        await mcp_client.cleanup()
+        mcp_client.llm_cache.close()
+        mcp_client.embedding_cache.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("catalog", help="NDJSON file of products, - reads stdin")
+    parser.add_argument("--checkpoint", help="Resume position of the run, used to resume an interrupted run over the same input")
+    parser.add_argument("--prepare-workers", type=int)
+    parser.add_argument("--embed-workers", type=int)
+    parser.add_argument("--store-workers", type=int)
+    parser.add_argument("--queue-size", type=int)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,26 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from core.vector_write_buffer import WriteTicket
+
+@dataclass
+class ProductDocument:
+    """One chunk of a product waiting to be embedded and stored."""
+    id: str
+    text: str
+    metadata: Dict[str, Any]
+
+@dataclass
+class ProductIngestion:
+    """State of one product as it moves through the prepare, embed and store stages."""
+    product_id: str
+    collection_name: str
+    documents: List[ProductDocument] = field(default_factory=list)
+    embeddings: List[List[float]] = field(default_factory=list)
+    stale_ids: Set[str] = field(default_factory=set)
+    unchanged: int = 0
+    # Paragraphs summarized for this product and the wall time it took
+    summarized: int = 0
+    summary_seconds: float = 0.0
+    # Set by the store stage while the vectors wait in the write-behind buffer
+    write_ticket: Optional[WriteTicket] = None
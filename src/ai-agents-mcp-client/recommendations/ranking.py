@@ -0,0 +1,143 @@
+"""Fusion of per-term vector search hits into one product ranking.
+
+Hits of every query term are flattened into parallel NumPy arrays (product
+code, term weight, similarity score, rank within the term) and each fusion
+strategy reduces them to one score per product with ``np.bincount`` style
+aggregations, so ranking cost stays linear in the number of hits.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from exceptions.service_exceptions import ValidationError
+
+@dataclass
+class ProductHits:
+    product_ids: List[str]
+    # One entry per hit
+    products: np.ndarray
+    weights: np.ndarray
+    scores: np.ndarray
+    ranks: np.ndarray
+
+    @property
+    def count(self) -> np.ndarray:
+        return np.bincount(self.products, minlength=len(self.product_ids))
+
+def _to_weight(value: Any) -> float:
+    # Term weights come from model JSON and are sometimes strings
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+def collect_hits(hits_per_term: Sequence[Sequence[Dict[str, Any]]], term_weights: Sequence[Any]) -> ProductHits:
+    """Flatten vector search matches, grouped per term, into hit arrays."""
+    codes: Dict[str, int] = {}
+    products, weights, scores, ranks = [], [], [], []
+    for term_hits, term_weight in zip(hits_per_term, term_weights):
+        term_weight = _to_weight(term_weight)
+        for rank, hit in enumerate(term_hits):
+            product_id = (hit.get("metadata") or {}).get("product_id")
+            if not product_id:
+                continue
+            # Codes follow first appearance, which is also the tie-break order
+            products.append(codes.setdefault(product_id, len(codes)))
+            weights.append(term_weight)
+            scores.append(hit.get("score", 0))
+            ranks.append(rank)
+
+    return ProductHits(
+        product_ids=list(codes),
+        products=np.asarray(products, dtype=np.int64),
+        weights=np.asarray(weights, dtype=np.float64),
+        scores=np.asarray(scores, dtype=np.float64),
+        ranks=np.asarray(ranks, dtype=np.int64),
+    )
+
+def cap_hits_per_product(hits: Sequence[Dict[str, Any]], max_hits: int) -> List[Dict[str, Any]]:
+    """Keep at most ``max_hits`` of the best hits of each product, hits must be sorted by score."""
+    kept, counts = [], {}
+    for hit in hits:
+        product_id = (hit.get("metadata") or {}).get("product_id")
+        counts[product_id] = counts.get(product_id, 0) + 1
+        if counts[product_id] <= max_hits:
+            kept.append(hit)
+    return kept
+
+class FusionStrategy(ABC):
+    @abstractmethod
+    def score(self, hits: ProductHits) -> np.ndarray:
+        """Return one fused score per product in ``hits.product_ids``."""
+
+class WeightedBlend(FusionStrategy):
+    """Blend of how many hits a product got and their mean weighted similarity.
+
+    Each hit scores ``similarity * term_weight ** weight_exponent``. The hit count and
+    the mean hit score are both normalised by their maximum over all products.
+    """
+
+    def __init__(self, weight: float = 0.5, weight_exponent: float = 1.5):
+        self.weight = weight
+        self.weight_exponent = weight_exponent
+
+    def score(self, hits: ProductHits) -> np.ndarray:
+        positive = (hits.scores > 0) & (hits.weights > 0)
+        combined = np.where(positive, hits.scores * np.abs(hits.weights) ** self.weight_exponent, 0.0)
+
+        count = hits.count
+        mean = np.bincount(hits.products, weights=combined, minlength=len(count)) / np.maximum(count, 1)
+        max_count, max_mean = count.max(), mean.max()
+        quantity_weight = count / max_count if max_count else np.zeros(len(count))
+        distance_weight = mean / max_mean if max_mean else np.zeros(len(count))
+        return self.weight * quantity_weight + (1 - self.weight) * distance_weight
+
+class ReciprocalRankFusion(FusionStrategy):
+    """Sum of ``term_weight / (k + rank)`` over a product's hits, ignores raw similarity values."""
+
+    def __init__(self, k: int = 60):
+        self.k = k
+
+    def score(self, hits: ProductHits) -> np.ndarray:
+        contributions = hits.weights / (self.k + hits.ranks + 1)
+        return np.bincount(hits.products, weights=contributions, minlength=len(hits.product_ids))
+
+class MaxSim(FusionStrategy):
+    """Best weighted similarity of any hit of the product."""
+
+    def score(self, hits: ProductHits) -> np.ndarray:
+        best = np.full(len(hits.product_ids), -np.inf)
+        np.maximum.at(best, hits.products, hits.scores * hits.weights)
+        return best
+
+FUSION_STRATEGIES = {
+    "weighted": WeightedBlend,
+    "rrf": ReciprocalRankFusion,
+    "max": MaxSim,
+}
+
+def get_fusion_strategy(name: str, **options) -> FusionStrategy:
+    if name not in FUSION_STRATEGIES:
+        raise ValidationError(
+            f"Unknown fusion strategy '{name}', expected one of {', '.join(FUSION_STRATEGIES)}",
+            "INVALID_FUSION_STRATEGY",
+        )
+    return FUSION_STRATEGIES[name](**options)
+
+def rank_products(hits_per_term: Sequence[Sequence[Dict[str, Any]]], term_weights: Sequence[Any],
+                  strategy: FusionStrategy, top_k: Optional[int] = None) -> List[Tuple[str, float]]:
+    """Fuse per-term hits and return the best ``top_k`` products (all when None) with their scores."""
+    hits = collect_hits(hits_per_term, term_weights)
+    if not hits.product_ids:
+        return []
+
+    scores = strategy.score(hits)
+    k = len(scores) if top_k is None else min(top_k, len(scores))
+    if k <= 0:
+        return []
+    top = np.arange(len(scores)) if k == len(scores) else np.argpartition(-scores, k - 1)[:k]
+    # Highest score first, ties keep the order products were first seen in
+    top = top[np.lexsort((top, -scores[top]))]
+    return [(hits.product_ids[index], float(scores[index])) for index in top]
@@ -1,5 +1,7 @@
-from fastapi import APIRouter
-from .recommendations_dto import GetEmbeddingsRequest, BuildUserProfileRequest, GetMostRelevantProductsRequest, GetMostRelevantProductsResponse
+from fastapi import APIRouter, Request
+from typing import Optional
+from .bulk_ingest import iter_ndjson_lines
+from .recommendations_dto import GetEmbeddingsRequest, BuildUserProfileRequest, GetMostRelevantProductsRequest, GetMostRelevantProductsResponse, CollectionStatsResponse, JobResponse
 from .recommendations_service import RecommendationsService
 from core.client_manager import ClientManager
 from fastapi import Depends
@@ -9,16 +11,46 @@ router = APIRouter()
 def get_recommendations_service() -> RecommendationsService:
     return RecommendationsService(ClientManager.get_mcp_client())    
 
-@router.post("/add-product-to-vector-db")
+async def run_add_product_job(payload, report):
+    # Runs on the job workers, each job picks the least busy MCP client when it starts
+    return await get_recommendations_service().run_add_product_job(payload, report)
+
+@router.post("/add-product-to-vector-db", response_model=JobResponse, status_code=202)
 async def add_product_to_vector_db(request: GetEmbeddingsRequest, service: RecommendationsService = Depends(get_recommendations_service)):    
     result = await service.add_product_to_vector_db(request)
     return result
 
+@router.get("/jobs")
+async def get_job_stats(service: RecommendationsService = Depends(get_recommendations_service)):
+    result = service.get_job_stats()
+    return result
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, service: RecommendationsService = Depends(get_recommendations_service)):
+    result = await service.get_job(job_id)
+    return result
+
+@router.post("/bulk-ingest")
+async def bulk_ingest(request: Request, checkpoint: Optional[str] = None, service: RecommendationsService = Depends(get_recommendations_service)):
+    # The NDJSON body is consumed as it arrives, never loaded whole
+    result = await service.bulk_ingest(iter_ndjson_lines(request.stream()), checkpoint=checkpoint)
+    return result
+
 @router.post("/get-most-relevant-products", response_model=GetMostRelevantProductsResponse)
 async def get_most_relevant_products(request: GetMostRelevantProductsRequest, service: RecommendationsService = Depends(get_recommendations_service)):
     result = await service.get_most_relevant_products(request)
     return result
 
+@router.get("/collections", response_model=CollectionStatsResponse)
+async def get_collection_stats(service: RecommendationsService = Depends(get_recommendations_service)):
+    result = await service.get_collection_stats()
+    return result
+
+@router.delete("/collections/{collection_name}")
+async def delete_collection(collection_name: str, service: RecommendationsService = Depends(get_recommendations_service)):
+    result = await service.delete_collection(collection_name)
+    return result
+
 @router.post("/build-user-profile")
 async def build_user_profile(request: BuildUserProfileRequest, service: RecommendationsService = Depends(get_recommendations_service)):
     result = await service.build_user_profile(request)
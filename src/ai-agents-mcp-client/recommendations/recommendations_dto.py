@@ -1,9 +1,13 @@
 from pydantic import BaseModel
+from typing import Any, Dict, Optional
+
+from core.vector_db import DEFAULT_COLLECTION
 
 class GetEmbeddingsRequest(BaseModel):
     name: str
     description: str
     product_id: str
+    collection_name: str = DEFAULT_COLLECTION
 
 class KeywordWithEmbedding(BaseModel):
     keyword: str
@@ -20,9 +24,35 @@ class BuildUserProfileResponse(BaseModel):
 
 class GetMostRelevantProductsRequest(BaseModel):
     user_profile: str
+    collection_name: str = DEFAULT_COLLECTION
+    bypass_cache: bool = False
+    # Number of products returned, all ranked products when unset
+    top_k: Optional[int] = None
+    # weighted, rrf or max, defaults to RECOMMENDATION_FUSION
+    fusion: Optional[str] = None
+    # flat or hierarchical, defaults to RECOMMENDATION_RETRIEVAL_MODE
+    retrieval_mode: Optional[str] = None
 
 class GetMostRelevantProductsResponse(BaseModel):
     result: list[str]
 
 class BuildUserProfileTool(BaseModel):
-    customer_id: str
\ No newline at end of file
+    customer_id: str
+
+class CollectionStatsResponse(BaseModel):
+    collections: Dict[str, int]
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    # queued, running, succeeded or failed
+    status: str
+    # Stage the job is in, or stopped in when it failed
+    stage: Optional[str] = None
+    progress: Dict[str, Any] = {}
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
@@ -4,17 +4,24 @@ from .recommendations_dto import (
     GetMostRelevantProductsResponse, 
 )
 from core.client_manager import ClientManager
-from core.vector_db import VectorDatabase
+from core.job_queue import JobManager
+from core.vector_db import DEFAULT_COLLECTION, VectorDatabase, content_hash, make_vector_id, vector_id_prefix
 from mcp_client import MCPClient
+from core.tool_executor import build_tool_messages
 import json
 import numpy as np
 from chunking.chunking_service import ChunkingService
 import asyncio
 from preprocess.preprocess_service import PreprocessService
-from preprocess.preprocess_dto import AddDocsToCollectionDto, SummaryContentDto
-from .recommendations_dto import BuildUserProfileRequest, BuildUserProfileResponse
-from collections import defaultdict
+from .recommendations_dto import BuildUserProfileRequest, BuildUserProfileResponse, CollectionStatsResponse, JobResponse
+from .bulk_ingest import BulkIngestionPipeline, checkpoint_path_for
+from .ingestion import ProductDocument, ProductIngestion
+from .ranking import cap_hits_per_product, get_fusion_strategy, rank_products
+from exceptions.service_exceptions import ValidationError
+from typing import Any, AsyncIterable, Dict, List, Optional
 import logging
+import os
+import time
 
 class RecommendationsService:
     mcp_client: MCPClient
@@ -22,74 +29,132 @@ class RecommendationsService:
     preprocess_service: PreprocessService
     openai_context_limit = 1000
     logger = logging.getLogger(__name__)
-    weight_exponent = 1.5
 
     def __init__(self, mcp_client: MCPClient):
         self.mcp_client = mcp_client
         self.chunking_service = ChunkingService()
         self.preprocess_service = PreprocessService(self.mcp_client)
 
-    async def add_product_to_vector_db(self, request: GetEmbeddingsRequest):
-        try:
-            document_chunks = await self.chunking_service.chunk_document(document=request.description)
-            collection_name = f"vector_products"
-            tasks = []
-            for section in document_chunks.sections:
-                section_id = section.get_id()
-                sentence_tasks = []
-                for paragraph in section.paragraphs:
-                    paragraph_id = paragraph.get_id()
-                    sentence_tasks.append(
-                        self.preprocess_service.add_docs(
-                            AddDocsToCollectionDto(
-                                texts=[
-                                    sentence.get_content()
-                                    for sentence in paragraph.sentences
-                                ],
-                                collection_name=collection_name,
-                                metadatas=[
-                                    {
-                                        "product_id": request.product_id,
-                                        "section_id": str(section_id),
-                                        "paragraph_id": str(paragraph_id),
-                                        "sentence_id": str(sentence.get_id()),
-                                        "content": sentence.get_content(),
-                                    }
-                                    for sentence in paragraph.sentences
-                                ],
-                            )
-                        )
-                    )
-                await asyncio.gather(*sentence_tasks)
-                summarized_paragraph = [
-                    await self.preprocess_service.summary_content(
-                        SummaryContentDto(
-                            content=paragraph.restore(),
-                            api_key=self.mcp_client.api_key
-                        )
-                ) if len(paragraph.restore()) >= self.openai_context_limit else paragraph.restore() for paragraph in section.paragraphs]
-                tasks.append(
-                    self.preprocess_service.add_docs(
-                        AddDocsToCollectionDto(
-                            texts= summarized_paragraph,
-                            collection_name=collection_name,
-                            metadatas=[
-                                {
-                                    "product_id": request.product_id,
-                                    "section_id": str(section_id),
-                                    "paragraph_id": str(paragraph.get_id()),
-                                    "content": paragraph_content,
-                                }
-                                for paragraph, paragraph_content in zip(section.paragraphs,summarized_paragraph)
-                            ],
-                        )
-                    )
-                )
-            await asyncio.gather(*tasks)
-            return True
-        except Exception as e:
-            self.logger.error(f"Error in add_product_to_vector_db: {e}")
-            return False
+    async def add_product_to_vector_db(self, request: GetEmbeddingsRequest) -> JobResponse:
+        """Queue the product for indexing and return the job tracking it."""
+        job = await JobManager.get_queue().submit("add_product", request.model_dump())
+        return JobResponse(**job.to_dict())
+
+    async def get_job(self, job_id: str) -> JobResponse:
+        job = await JobManager.get_queue().get(job_id)
+        return JobResponse(**job.to_dict())
+
+    def get_job_stats(self) -> Dict[str, Any]:
+        return JobManager.get_queue().get_stats()
+
+    async def run_add_product_job(self, payload: Dict[str, Any], report) -> Dict[str, int]:
+        request = GetEmbeddingsRequest(**payload)
+        await report("prepare")
+        ingestion = await self.prepare_product(request)
+        await report("embed", documents=len(ingestion.documents), unchanged=ingestion.unchanged,
+                     stale=len(ingestion.stale_ids), summarized=ingestion.summarized,
+                     summary_seconds=round(ingestion.summary_seconds, 3))
+        await self.embed_product(ingestion)
+        await report("store")
+        await self.store_product(ingestion)
+        # The job only succeeds once its own vectors are written, their batch is still shared with other jobs
+        await VectorDatabase.flush([ingestion.write_ticket])
+        return {"vectors": len(ingestion.documents), "deleted": len(ingestion.stale_ids)}
+
+    async def prepare_product(self, request: GetEmbeddingsRequest) -> ProductIngestion:
+        """Chunk a product description and collect the documents that still need indexing.
+
+        Vector IDs hash the chunk content, so chunks already stored for this product
+        are skipped and stored chunks no longer in the description become stale.
+        Skipped vectors keep the metadata they were stored with, so it only holds
+        content-derived values and no section or paragraph positions.
+        """
+        collection_name = request.collection_name
+        existing_ids = set(await VectorDatabase.list_ids(vector_id_prefix(request.product_id),
+                                                         collection_name=collection_name))
+        ingestion = ProductIngestion(product_id=request.product_id, collection_name=collection_name)
+        current_ids = set()
+        # (vector ID, restored text) of paragraphs not indexed yet
+        new_paragraphs = []
+        # Sections are chunked as they are consumed, only the new documents are kept
+        for section in self.chunking_service.iter_sections(request.description):
+            for paragraph in section.paragraphs:
+                for sentence in paragraph.sentences:
+                    vector_id = make_vector_id(request.product_id, "sentence", sentence.get_content())
+                    if sentence.get_content() and vector_id not in current_ids and vector_id not in existing_ids:
+                        ingestion.documents.append(ProductDocument(
+                            id=vector_id,
+                            text=sentence.get_content(),
+                            metadata={
+                                "product_id": request.product_id,
+                                "level": "sentence",
+                                # Marks sentence vectors for hierarchical retrieval
+                                "sentence_id": content_hash(sentence.get_content()),
+                                "content": sentence.get_content(),
+                            },
+                        ))
+                    current_ids.add(vector_id)
+
+                paragraph_content = paragraph.restore()
+                if not paragraph_content:
+                    continue
+                # Keyed by the original text, so unchanged paragraphs are not summarized again
+                vector_id = make_vector_id(request.product_id, "paragraph", paragraph_content)
+                if vector_id not in current_ids and vector_id not in existing_ids:
+                    new_paragraphs.append((vector_id, paragraph_content))
+                current_ids.add(vector_id)
+
+        # Long paragraphs of every section are summarized concurrently
+        long_contents = [content for _, content in new_paragraphs if len(content) >= self.openai_context_limit]
+        started = time.perf_counter()
+        summaries = dict(zip(long_contents, await self.preprocess_service.summarize_many(long_contents)))
+        ingestion.summarized = len(long_contents)
+        ingestion.summary_seconds = time.perf_counter() - started if long_contents else 0.0
+
+        for vector_id, paragraph_content in new_paragraphs:
+            paragraph_content = summaries.get(paragraph_content, paragraph_content)
+            if not paragraph_content:
+                continue
+            ingestion.documents.append(ProductDocument(
+                id=vector_id,
+                text=paragraph_content,
+                metadata={
+                    "product_id": request.product_id,
+                    "level": "paragraph",
+                    "content": paragraph_content,
+                },
+            ))
+
+        ingestion.stale_ids = existing_ids - current_ids
+        ingestion.unchanged = len(current_ids & existing_ids)
+        return ingestion
+
+    async def embed_product(self, ingestion: ProductIngestion):
+        # All new chunks of the product go out in one batched embeddings call
+        if ingestion.documents:
+            ingestion.embeddings = await self.mcp_client.embed_texts([document.text for document in ingestion.documents])
+
+    async def store_product(self, ingestion: ProductIngestion):
+        if ingestion.documents:
+            ingestion.write_ticket = await VectorDatabase.batch_store_embeddings(
+                collection_name=ingestion.collection_name,
+                keyword_embeddings=[
+                    {"id": document.id, "embedding": embedding, "metadata": document.metadata}
+                    for document, embedding in zip(ingestion.documents, ingestion.embeddings)
+                ],
+            )
+        # Chunks that are no longer in the description
+        await VectorDatabase.delete(list(ingestion.stale_ids), collection_name=ingestion.collection_name)
+        self.logger.info(
+            f"Indexed product {ingestion.product_id}: {len(ingestion.documents)} new, "
+            f"{ingestion.unchanged} unchanged, {len(ingestion.stale_ids)} removed vectors, "
+            f"{ingestion.summarized} paragraphs summarized in {ingestion.summary_seconds:.2f}s"
+        )
+
+    async def bulk_ingest(self, lines: AsyncIterable[str], checkpoint: Optional[str] = None) -> Dict[str, Any]:
+        pipeline = BulkIngestionPipeline(self, checkpoint_path=checkpoint_path_for(checkpoint))
+        report = await pipeline.run(lines)
+        return report.to_dict()
 
     async def get_most_relevant_products(self, request: GetMostRelevantProductsRequest):
         prompt = f"""
@@ -106,7 +171,9 @@ class RecommendationsService:
             }}
         """
 
-        query_term = self.mcp_client.client.chat.completions.create(
+        query_term = await self.mcp_client.create_chat_completion(
+            cache_endpoint="query_terms",
+            bypass_cache=request.bypass_cache,
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": prompt},
@@ -118,73 +185,89 @@ class RecommendationsService:
         self.logger.info(f"Term results: {term_results}")
 
         relevant_results = term_results.get("relevant_results", [])
-        # Get the embedding for each result in relevant_results
-        embedding_with_weight = []
-        for relevant_result in relevant_results:
-            embedding = self.mcp_client.client.embeddings.create(
-                model="text-embedding-3-large",
-                input=relevant_result.get('text')
-            )
-            # The embedding vector is typically in embedding.data[0].embedding
-            embedding_with_weight.append({
-                "embedding": embedding.data[0].embedding,
+        # Embed every query term in one batched request, weights stay aligned by position
+        relevant_results = [relevant_result for relevant_result in relevant_results if relevant_result.get("text")]
+        embeddings = await self.mcp_client.embed_texts([relevant_result["text"] for relevant_result in relevant_results])
+        embedding_with_weight = [
+            {
+                "embedding": embedding,
                 "weight": relevant_result.get("weight", 0)
-            })
+            }
+            for relevant_result, embedding in zip(relevant_results, embeddings)
+        ]
     
 
-        product_scores = defaultdict(list)
-        for embedding_with_weight in embedding_with_weight:
-            similar_results = VectorDatabase.find_similar(
-                query_embedding=embedding_with_weight.get("embedding"),
-                limit=10,
-                min_score=0.5
+        query_embeddings = [item.get("embedding") for item in embedding_with_weight]
+        retrieval_mode = request.retrieval_mode or os.getenv("RECOMMENDATION_RETRIEVAL_MODE", "flat")
+        if retrieval_mode == "flat":
+            # One parallel retrieval round for every query term
+            similar_results_per_term = await VectorDatabase.find_similar_many(
+                query_embeddings=query_embeddings,
+                limit=int(os.getenv("RECOMMENDATION_HITS_PER_TERM", 10)),
+                min_score=0.5,
+                collection_name=request.collection_name,
             )
-        
-            for result in similar_results:
-                product_id = result["metadata"].get("product_id")
-                distance = result.get("score", 0)
-                if product_id:
-                    term_weight = embedding_with_weight.get("weight", 0)
-                    if distance > 0 and term_weight > 0:
-                        combined_score = distance * (term_weight ** self.weight_exponent)
-                    else:
-                        combined_score = 0
+        elif retrieval_mode == "hierarchical":
+            similar_results_per_term = await self.find_similar_hierarchical(query_embeddings, request.collection_name)
+        else:
+            raise ValidationError(f"Unknown retrieval mode '{retrieval_mode}', expected flat or hierarchical", "INVALID_RETRIEVAL_MODE")
 
-                    product_scores[product_id].append(combined_score)
+        fusion = request.fusion or os.getenv("RECOMMENDATION_FUSION", "weighted")
+        product_rankings = rank_products(
+            similar_results_per_term,
+            [term.get("weight", 0) for term in embedding_with_weight],
+            get_fusion_strategy(fusion),
+            top_k=request.top_k,
+        )
 
-        all_counts = [len(scores) for scores in product_scores.values()]
-        all_avg_scores = [sum(scores)/len(scores) for scores in product_scores.values()]
+        product_ids = [product_id for product_id, _ in product_rankings]
 
-        max_count = max(all_counts) if all_counts else 1
-        max_avg_score = max(all_avg_scores) if all_avg_scores else 1
+        return GetMostRelevantProductsResponse(result=product_ids)
 
-        weight = 0.5
+    async def find_similar_hierarchical(self, query_embeddings: List[List[float]],
+                                        collection_name: str = DEFAULT_COLLECTION) -> List[List[Dict[str, Any]]]:
+        """Two-stage retrieval, paragraph summaries pick the products, their sentences score them.
 
-        product_rankings = []
-        for product_id, scores in product_scores.items():
-            count = len(scores)
-            avg_score = sum(scores) / count if count else 0
-            quantity_weight = count / max_count if max_count else 0
-            distance_weight = avg_score / max_avg_score if max_avg_score else 0
-            final_score = weight * quantity_weight + (1 - weight) * distance_weight
-            product_rankings.append((product_id, final_score))
+        Paragraph vectors are the ones without a ``sentence_id``, which also covers
+        vectors stored before the ``level`` field existed.
+        """
+        paragraph_hits_per_term = await VectorDatabase.find_similar_many(
+            query_embeddings=query_embeddings,
+            limit=int(os.getenv("RECOMMENDATION_CANDIDATE_PARAGRAPHS", 20)),
+            min_score=0.5,
+            filter={"sentence_id": {"$exists": False}},
+            collection_name=collection_name,
+        )
+        candidate_products = list(dict.fromkeys(
+            hit["metadata"]["product_id"]
+            for paragraph_hits in paragraph_hits_per_term
+            for hit in paragraph_hits
+            if hit["metadata"].get("product_id")
+        ))
+        if not candidate_products:
+            return [[] for _ in query_embeddings]
 
-        product_rankings.sort(key=lambda x: x[1], reverse=True)
+        sentence_hits_per_term = await VectorDatabase.find_similar_many(
+            query_embeddings=query_embeddings,
+            limit=int(os.getenv("RECOMMENDATION_HITS_PER_TERM", 10)),
+            min_score=0.5,
+            filter={"sentence_id": {"$exists": True}, "product_id": {"$in": candidate_products}},
+            collection_name=collection_name,
+        )
+        # Neighbouring sentences of one product tend to match together, keep only its best few
+        max_hits = int(os.getenv("RECOMMENDATION_MAX_HITS_PER_PRODUCT", 3))
+        return [cap_hits_per_product(sentence_hits, max_hits) for sentence_hits in sentence_hits_per_term]
 
-        product_ids = [product_id for product_id, _ in product_rankings]
+    async def get_collection_stats(self) -> CollectionStatsResponse:
+        return CollectionStatsResponse(collections=await VectorDatabase.get_collection_stats())
 
-        return GetMostRelevantProductsResponse(result=product_ids)
+    async def delete_collection(self, collection_name: str):
+        await VectorDatabase.delete_collection(collection_name)
+        return True
 
     async def build_user_profile(self, request: BuildUserProfileRequest):
-        tools_response = await self.mcp_client.session.list_tools()
-        available_tools = [{
-            "type": "function",
-            "function": {
-                "name": tool.name,
-                "description": tool.description,
-                "parameters": tool.inputSchema
-            }
-        } for tool in tools_response.tools]
+        tool_catalog = await self.mcp_client.get_tool_catalog()
+        available_tools = tool_catalog.openai_tools
 
         messages = [
             {
@@ -201,51 +284,17 @@ class RecommendationsService:
             }
         ]
 
-        completion = self.mcp_client.client.chat.completions.create(
+        completion = await self.mcp_client.create_chat_completion(
             model="gpt-4o-mini",
             messages=messages,
             tools=available_tools
         )
 
-        # Process each tool call and gather data
-        tool_results = {}
-        if completion.choices[0].message.tool_calls:
-            for tool_call in completion.choices[0].message.tool_calls:
-                tool_name = tool_call.function.name
-                tool_args = json.loads(tool_call.function.arguments)
-                tool_result = await self.mcp_client.session.call_tool(tool_name, tool_args)
-                self.logger.info(f"Tool call result: {tool_result}")
-                tool_results[tool_name] = tool_result.content
-                
+        # Run the requested tool calls concurrently, results keep the tool call order
+        tool_call_results = await self.mcp_client.execute_tool_calls(completion.choices[0].message.tool_calls)
+
         # Make a follow-up request with the data from tool calls
-        follow_up_messages = messages.copy()
-        
-        # Add assistant's tool call message
-        follow_up_messages.append({
-            "role": "assistant",
-            "content": None,
-            "tool_calls": [
-                {
-                    "id": tool_call.id,
-                    "type": "function",
-                    "function": {
-                        "name": tool_call.function.name,
-                        "arguments": tool_call.function.arguments
-                    }
-                } for tool_call in completion.choices[0].message.tool_calls
-            ]
-        })
-        
-        # Add tool results as tool response messages
-        for tool_call in completion.choices[0].message.tool_calls:
-            tool_name = tool_call.function.name
-            result = tool_results.get(tool_name, None)
-            if result:
-                follow_up_messages.append({
-                    "tool_call_id": tool_call.id,
-                    "role": "tool",
-                    "content": result,
-                })
+        follow_up_messages = messages + build_tool_messages(tool_call_results)
         
         follow_up_prompt = """
             Based on this data, build the customer profile based on this template:
@@ -290,7 +339,7 @@ class RecommendationsService:
             "content": follow_up_prompt
         })
 
-        response = self.mcp_client.client.chat.completions.create(
+        response = await self.mcp_client.create_chat_completion(
             model="gpt-4o-mini",
             messages=follow_up_messages,
         )
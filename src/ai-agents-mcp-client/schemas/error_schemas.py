@@ -13,6 +13,7 @@ class ErrorCode(str, Enum):
     AI_SERVICE_ERROR = "AI_SERVICE_ERROR"
     VECTOR_DB_ERROR = "VECTOR_DB_ERROR"
     CONFIGURATION_ERROR = "CONFIGURATION_ERROR"
+    CAPACITY_ERROR = "CAPACITY_ERROR"
 
 class ErrorDetail(BaseModel):
     field: Optional[str] = None